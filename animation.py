@@ -0,0 +1,144 @@
+import math
+import os
+import pygame
+from layers import prepare
+from sprites import arrow_image, spike_image
+
+# Sprite animation. Every frame of every animation is packed into one atlas
+# surface and sprites are drawn as (atlas, position, area) entries, so all
+# sprites of a frame go to the screen in a single blits() call (and share
+# one texture with the texture backend).
+#
+# Art is loaded from sprite sheets in assets/ when they exist:
+#
+#   player.png  frames of the arrow pointing right, 30x20 pixels each
+#   spike.png   frames of a spike, square, scaled to each spike size
+#   bounce.png  frames of the flash shown where the player bounces, square
+#
+# Frames are laid out left to right. Without the files the game draws the
+# same shapes it always did, plus a small ring for the bounce effect.
+
+ASSET_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "assets")
+PLAYER_ANGLES = (0, 60, -60, 120)  # Every angle the player can point at, pre-rotated
+
+def load_sheet(name, frame_width=None, frame_height=None):
+    # Cut assets/<name>.png into frames, None if there is no such sheet.
+    # Without a frame size the frames are squares as high as the sheet.
+    path = os.path.join(ASSET_DIR, name + ".png")
+    if not os.path.exists(path):
+        return None
+    sheet = pygame.image.load(path)
+    frame_height = frame_height or sheet.get_height()
+    frame_width = frame_width or frame_height
+    frames = []
+    for y in range(0, sheet.get_height() - frame_height + 1, frame_height):
+        for x in range(0, sheet.get_width() - frame_width + 1, frame_width):
+            frames.append(sheet.subsurface((x, y, frame_width, frame_height)).copy())
+    return frames
+
+class Atlas:
+    # Images packed into one surface, shelf by shelf. The atlas grows when
+    # it is full; adding images after the game started is fine but rare.
+    # version counts the changes, a texture made from the surface is stale
+    # once it moved on.
+    def __init__(self, width=1024):
+        self.width = width
+        self.version = 0
+        self.surface = prepare(pygame.Surface((width, 256), pygame.SRCALPHA))
+        self.x = 0
+        self.y = 0
+        self.shelf_height = 0
+
+    def add(self, image):
+        # Copy an image into the atlas and return its area there
+        width, height = image.get_size()
+        if self.x + width > self.width:
+            self.x = 0
+            self.y += self.shelf_height + 1  # A pixel of space so scaled drawing never bleeds
+            self.shelf_height = 0
+        if self.y + height > self.surface.get_height():
+            grown = pygame.Surface((self.width, max(self.surface.get_height() * 2, self.y + height)),
+                                   pygame.SRCALPHA)
+            grown.blit(self.surface, (0, 0), special_flags=pygame.BLEND_RGBA_MAX)
+            self.surface = prepare(grown)
+        area = pygame.Rect(self.x, self.y, width, height)
+        # The atlas is fully transparent here, so MAX copies the pixels exactly
+        # where a normal alpha blit would blend them
+        self.surface.blit(image, area, special_flags=pygame.BLEND_RGBA_MAX)
+        self.version += 1
+        self.x += width + 1
+        self.shelf_height = max(self.shelf_height, height)
+        return area
+
+class Animation:
+    # Atlas areas shown fps times a second. Time is counted in game frames
+    # (60 a second) so animations are in step with the game, not the screen.
+    def __init__(self, areas, fps=12, loop=True):
+        self.areas = areas
+        self.fps = fps
+        self.loop = loop
+        self.frames = math.ceil(len(areas) * 60 / fps)  # Length in game frames
+
+    def area(self, frame):
+        index = frame * self.fps // 60
+        if self.loop:
+            return self.areas[index % len(self.areas)]
+        return self.areas[min(index, len(self.areas) - 1)]
+
+class Art:
+    # The atlas and animations for the player, spikes and wall effects.
+    # sprite() returns a ready to use blits() entry centered on a point.
+    def __init__(self, player_size, player_color, spike_color, spike_outline_color):
+        self.atlas = Atlas()
+        self.player_size = player_size
+        self.player_color = player_color
+        self.spike_color = spike_color
+        self.spike_outline_color = spike_outline_color
+
+        self.player_frames = load_sheet("player", player_size * 3, player_size * 2)
+        self.spike_frames = load_sheet("spike")
+        self.player = {angle: self.player_animation(angle) for angle in PLAYER_ANGLES}
+        self.spikes = {}  # size -> Animation, made for each size the first time it is seen
+        self.bounce = self.bounce_animation()
+
+    def player_animation(self, angle):
+        if self.player_frames is None:
+            frames = [arrow_image(angle, self.player_size, self.player_color)[0]]
+        else:
+            # pygame rotates counterclockwise, game angles turn clockwise (y points down)
+            frames = [pygame.transform.rotate(frame, -angle) for frame in self.player_frames]
+        return Animation([self.atlas.add(frame) for frame in frames])
+
+    def spike_animation(self, size):
+        if self.spike_frames is None:
+            frames = [spike_image(size, self.spike_color, self.spike_outline_color)]
+        else:
+            frames = [pygame.transform.smoothscale(frame, (size * 2, size * 2)) for frame in self.spike_frames]
+        return Animation([self.atlas.add(frame) for frame in frames])
+
+    def bounce_animation(self):
+        frames = load_sheet("bounce")
+        if frames is None:
+            # An expanding ring that fades out
+            frames = []
+            for i in range(6):
+                frame = pygame.Surface((32, 32), pygame.SRCALPHA)
+                pygame.draw.circle(frame, (255, 255, 255, 220 - i * 35), (16, 16), 4 + i * 2, 2)
+                frames.append(frame)
+        return Animation([self.atlas.add(frame) for frame in frames], fps=30, loop=False)
+
+    def sprite(self, animation, frame, center_x, center_y):
+        area = animation.area(frame)
+        return (self.atlas.surface, (center_x - area.width / 2, center_y - area.height / 2), area)
+
+    def player_sprite(self, player, frame, offset_y=0):
+        animation = self.player.get(player.angle)
+        if animation is None:
+            animation = self.player[player.angle] = self.player_animation(player.angle)
+        return self.sprite(animation, frame, player.rect.centerx, player.rect.centery + offset_y)
+
+    def spike_sprite(self, spike, frame, camera_x):
+        animation = self.spikes.get(spike.size)
+        if animation is None:
+            animation = self.spikes[spike.size] = self.spike_animation(spike.size)
+        return self.sprite(animation, frame, spike.x - camera_x, spike.y)
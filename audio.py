@@ -0,0 +1,108 @@
+import os
+import numpy as np
+import pygame
+from animation import ASSET_DIR
+
+# Sound effects with as little delay as possible:
+#
+#   - the mixer is opened with a small buffer (256 samples, about 6 ms)
+#   - every sound is decoded (or synthesized) into a Sound buffer at startup,
+#     playing one is just handing that buffer to a channel
+#   - a fixed pool of channels plays them; when all are busy a new sound
+#     takes over the channel of the least important, oldest sound, and is
+#     dropped if everything playing is more important
+#
+# Sounds are loaded from assets/<name>.wav or .ogg when there is such a
+# file and synthesized otherwise. Without an audio device, or with
+# enabled=False, play() does nothing.
+
+FREQUENCY = 44100
+BUFFER = 256
+
+# name -> priority, higher priorities take channels from lower ones
+SOUNDS = {
+    "bounce": 1,
+    "milestone": 2,
+    "death": 3,
+}
+
+def tone(frequencies, duration, volume=0.3, decay=6.0, noise=0.0):
+    # Mono samples in -1..1: a sweep through frequencies (one per sample or
+    # a single value) fading out, with some noise mixed in
+    count = int(FREQUENCY * duration)
+    t = np.arange(count) / FREQUENCY
+    phase = 2 * np.pi * np.cumsum(np.broadcast_to(frequencies, (count,))) / FREQUENCY
+    samples = np.sin(phase) * (1 - noise) + np.random.default_rng(0).uniform(-1, 1, count) * noise
+    return samples * np.exp(-decay * t) * volume
+
+def synthesize(name):
+    if name == "bounce":
+        return tone(np.linspace(900, 600, int(FREQUENCY * 0.06)), 0.06, decay=40)
+    if name == "milestone":
+        first = tone(660, 0.1, decay=8)
+        second = tone(990, 0.15, decay=8)
+        return np.concatenate([first, second])
+    if name == "death":
+        return tone(np.linspace(400, 60, int(FREQUENCY * 0.5)), 0.5, volume=0.4, decay=4, noise=0.3)
+    raise ValueError(f"no sound called {name}")
+
+def load_sound(name):
+    for extension in (".wav", ".ogg"):
+        path = os.path.join(ASSET_DIR, name + extension)
+        if os.path.exists(path):
+            return pygame.mixer.Sound(path)
+    samples = (synthesize(name) * 32767).astype(np.int16)
+    channels = pygame.mixer.get_init()[2]
+    return pygame.sndarray.make_sound(np.ascontiguousarray(np.repeat(samples[:, None], channels, axis=1)))
+
+class ChannelPool:
+    # A fixed set of mixer channels, each remembering how important the
+    # sound on it is and when it started
+    def __init__(self, count):
+        pygame.mixer.set_num_channels(count)
+        self.channels = [pygame.mixer.Channel(i) for i in range(count)]
+        self.priorities = [0] * count
+        self.started = [0] * count
+        self.plays = 0
+
+    def play(self, sound, priority):
+        # Returns False when every channel plays something more important
+        chosen = -1
+        for i, channel in enumerate(self.channels):
+            if not channel.get_busy():
+                chosen = i
+                break
+            if self.priorities[i] <= priority and (
+                    chosen < 0 or self.priorities[i] < self.priorities[chosen]
+                    or (self.priorities[i] == self.priorities[chosen] and self.started[i] < self.started[chosen])):
+                chosen = i
+        if chosen < 0:
+            return False
+        self.plays += 1
+        self.channels[chosen].play(sound)
+        self.priorities[chosen] = priority
+        self.started[chosen] = self.plays
+        return True
+
+class Audio:
+    def __init__(self, enabled=False, channels=8):
+        self.enabled = False
+        self.sounds = {}
+        self.pool = None
+        if not enabled:
+            return
+        # pre_init only takes effect before the mixer is opened
+        pygame.mixer.pre_init(FREQUENCY, -16, 2, BUFFER)
+        try:
+            pygame.mixer.init()
+        except pygame.error:
+            return  # No audio device, play silently
+        self.sounds = {name: (load_sound(name), priority) for name, priority in SOUNDS.items()}
+        self.pool = ChannelPool(channels)
+        self.enabled = True
+
+    def play(self, name):
+        if not self.enabled:
+            return False
+        sound, priority = self.sounds[name]
+        return self.pool.play(sound, priority)
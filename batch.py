@@ -0,0 +1,247 @@
+import math
+import numpy as np
+from game import Game
+
+# Runs many independent games in lockstep with NumPy. All per-game state
+# lives in arrays with one row per game and a single step() advances every
+# game at once. The rules are a line by line copy of Game.update(), so for
+# the same seed and inputs a BatchGame row matches a headless Game exactly.
+
+PLAYER_X = 100  # The player never moves horizontally, the camera does
+
+def round_rect(values):
+    # pygame.Rect rounds floats half away from zero when they are assigned
+    whole = np.trunc(values)
+    return whole + np.sign(values) * (np.abs(values - whole) >= 0.5)
+
+def line_circle_collision(line_x1, line_y1, line_x2, line_y2, circle_x, circle_y, radius):
+    # Array version of geometry.line_circle_collision, same operations in the same order
+    dx = circle_x - line_x1
+    dy = circle_y - line_y1
+    line_dx = line_x2 - line_x1
+    line_dy = line_y2 - line_y1
+    length_squared = line_dx**2 + line_dy**2
+    point = length_squared == 0
+    dot_product = dx*line_dx + dy*line_dy
+    with np.errstate(divide="ignore", invalid="ignore"):
+        t = np.maximum(0, np.minimum(1, dot_product / length_squared))
+    closest_x = line_x1 + t * line_dx
+    closest_y = line_y1 + t * line_dy
+    distance = np.sqrt((circle_x - closest_x)**2 + (circle_y - closest_y)**2)
+    return ~point & (distance <= radius)
+
+def spike_collision(spike_x, spike_y, spike_size, camera_x, player_x, player_y, player_size):
+    # Array version of Spike.check_collision
+    screen_pos_x = spike_x - camera_x
+    dx = screen_pos_x - player_x
+    dy = spike_y - player_y
+    distance = np.sqrt(dx*dx + dy*dy)
+    return distance < spike_size * 0.7 + player_size
+
+def build_level(seed, screen_width, screen_height, wall_segments, check_reachable=True):
+    # Generate the whole first level of Game(seed=seed), with the same code
+    # and random sequence, without streaming any chunks out again
+    level = Game(screen_width, screen_height, headless=True, seed=seed, wall_segments=wall_segments,
+                 check_reachable=check_reachable).level
+    chunks = list(level.chunks)
+    while level.next_chunk < wall_segments:
+        chunks.append(level.generate_chunk(level.next_chunk))
+        level.next_chunk += 1
+    spikes = [spike for chunk in chunks for spike in chunk.spikes]
+    return level.segments, spikes
+
+class Table:
+    # One kind of object (flat walls, angled walls or spikes) for all games,
+    # padded to the same length and sorted by left edge like SpatialIndex.
+    # near() returns a fixed size window of candidates per game, found by
+    # one binary search over all rows, so the cost per step does not grow
+    # with the length of the level.
+    def __init__(self, rows, columns, query_width):
+        count = max([len(row) for row in rows] + [1])
+        self.data = {name: np.zeros((len(rows), count)) for name in columns}
+        self.valid = np.zeros((len(rows), count), dtype=bool)
+        for n, row in enumerate(rows):
+            if row:
+                # Stable sort, objects with equal left edges keep their order
+                values = np.array(sorted(row, key=lambda item: item[0]), dtype=np.float64)
+                for j, name in enumerate(columns):
+                    self.data[name][n, :len(row)] = values[:, j]
+            self.valid[n, :len(row)] = True
+
+        # Padding goes after the real objects and far to the right of them
+        starts = self.data["x_min"].copy()
+        ends = self.data["x_max"]
+        self.max_width = float(np.max(ends - starts, initial=0, where=self.valid))
+        far = float(np.max(np.abs(ends), initial=0, where=self.valid)) + self.max_width + query_width + 1
+        starts[~self.valid] = far
+        self.row_offset = np.arange(len(rows))[:, None] * (4 * far)
+        self.flat_starts = (starts + self.row_offset).ravel()
+        self.count = count
+
+        # Largest number of objects that can start inside one query
+        span = query_width + self.max_width
+        self.window = 1
+        for row, valid in zip(starts, self.valid):
+            row = row[valid]
+            if len(row):
+                inside = np.searchsorted(row, row + span, side="right") - np.arange(len(row))
+                self.window = max(self.window, int(inside.max()))
+
+    def near(self, x_min, x_max):
+        # Indices (games x window) of objects overlapping [x_min, x_max] per game
+        offset = self.row_offset[:, 0]
+        first = np.searchsorted(self.flat_starts, x_min - self.max_width + offset)
+        first = first - np.arange(len(offset)) * self.count
+        index = first[:, None] + np.arange(self.window)
+        inside = index < self.count
+        index = np.minimum(index, self.count - 1)
+        rows = np.arange(len(offset))[:, None]
+        mask = (inside & self.valid[rows, index]
+                & (self.data["x_min"][rows, index] <= x_max[:, None])
+                & (self.data["x_max"][rows, index] >= x_min[:, None]))
+        return rows, index, mask
+
+    def column(self, name, rows, index):
+        return self.data[name][rows, index]
+
+class BatchGame:
+    def __init__(self, seeds, screen_width=800, screen_height=600, wall_segments=20, check_reachable=True):
+        # check_reachable is passed to Game, the levels are the same as its levels
+        self.screen_width = screen_width
+        self.screen_height = screen_height
+        self.seeds = list(seeds)
+        self.wall_segments = wall_segments
+        count = len(self.seeds)
+
+        # Same constants as Game and Player
+        self.game_speed = 3
+        self.player_size = 10
+        self.player_speed = 2
+        self.player_height = self.player_size * 2
+        self.player_center_x = PLAYER_X
+
+        # dy for every angle update_player_angle can pick, computed exactly like Player
+        self.dy_table = {angle: math.sin(math.radians(angle)) * self.player_speed
+                         for angle in (-60, 60, 120)}
+
+        # Per-game state
+        self.camera_x = np.zeros(count, dtype=np.int64)
+        self.frame = np.zeros(count, dtype=np.int64)
+        self.score = np.zeros(count, dtype=np.int64)
+        self.y = np.full(count, screen_height // 2 - self.player_height // 2, dtype=np.float64)
+        self.dy = np.zeros(count)
+        self.angle = np.zeros(count, dtype=np.int64)
+        self.last_wall_top = np.zeros(count, dtype=bool)  # False means "bottom"
+        self.is_mouse_down = np.zeros(count, dtype=bool)
+        self.game_over = np.zeros(count, dtype=bool)
+
+        # Level geometry as padded arrays
+        flat, angled, spikes = [], [], []
+        self.top_wall_points = []
+        self.bottom_wall_points = []
+        for seed in self.seeds:
+            segments, level_spikes = build_level(seed, screen_width, screen_height, wall_segments, check_reachable)
+            walls = [segments.line(i) + (segments.flat[i - segments.base], segments.top[i - segments.base])
+                     for i in range(segments.base, segments.end)]
+            flat.append([(min(x1, x2), max(x1, x2), x1, y1, x2, y2, top)
+                         for x1, y1, x2, y2, is_flat, top in walls if is_flat])
+            angled.append([(min(x1, x2), max(x1, x2), x1, y1, x2, y2)
+                           for x1, y1, x2, y2, is_flat, top in walls if not is_flat])
+            spikes.append([(s.x - s.size, s.x + s.size, s.x, s.y, s.size) for s in level_spikes])
+            self.top_wall_points.append(self.polyline(walls, 1))
+            self.bottom_wall_points.append(self.polyline(walls, 0))
+
+        # Flat walls are queried at a single x, the others around the player
+        reach = 2 * self.player_size
+        self.flat_walls = Table(flat, ("x_min", "x_max", "x1", "y1", "x2", "y2", "top"), 0)
+        self.angled_walls = Table(angled, ("x_min", "x_max", "x1", "y1", "x2", "y2"), reach)
+        self.spikes = Table(spikes, ("x_min", "x_max", "x", "y", "size"), reach)
+
+    def polyline(self, walls, top):
+        walls = [wall for wall in walls if wall[5] == top]
+        points = [(wall[0], wall[1]) for wall in walls] + [(wall[2], wall[3]) for wall in walls[-1:]]
+        return np.array(points, dtype=np.float64).reshape(-1, 2)
+
+    def step(self, mouse_down):
+        # Advance every game one frame, mouse_down holds one bool per game
+        mouse_down = np.asarray(mouse_down, dtype=bool)
+        alive = ~self.game_over
+
+        # Game.handle_mouse_down / handle_mouse_up
+        edge = alive & (mouse_down != self.is_mouse_down)
+        self.is_mouse_down = np.where(edge, mouse_down, self.is_mouse_down)
+        self.update_player_angle(edge)
+
+        # Game.update
+        self.frame += alive
+        self.camera_x += alive * self.game_speed
+
+        # Player.update, the screen edge checks use the same fixed 600 as Player.
+        # The player's x never changes, so Game's left/right edge checks never fire.
+        y = np.where(alive, round_rect(self.y + self.dy), self.y)
+        y = np.where(alive & (y < 0), 0, y)
+        y = np.where(alive & (y + self.player_height > 600), 600 - self.player_height, y)
+        self.y = y
+
+        self.handle_wall_collisions(alive)
+        self.check_obstacle_collisions(alive)
+
+        self.score = np.where(alive, self.camera_x // 10, self.score)
+        self.update_player_angle(alive)
+        return self.game_over
+
+    def update_player_angle(self, mask):
+        angle = np.where(self.last_wall_top,
+                         np.where(self.is_mouse_down, 120, 60),
+                         np.where(self.is_mouse_down, -60, 60))
+        dy = np.where(angle == 120, self.dy_table[120],
+                      np.where(angle == -60, self.dy_table[-60], self.dy_table[60]))
+        self.angle = np.where(mask, angle, self.angle)
+        self.dy = np.where(mask, dy, self.dy)
+
+    def handle_wall_collisions(self, alive):
+        player_x = (self.player_center_x + self.camera_x).astype(np.float64)
+        rows, index, mask = self.flat_walls.near(player_x, player_x)
+        column = lambda name: self.flat_walls.column(name, rows, index)
+        x1, y1, x2, y2, top = column("x1"), column("y1"), column("x2"), column("y2"), column("top")
+
+        # Walls are visited in index order because each bounce moves the player
+        for k in range(index.shape[1]):
+            hit = alive & mask[:, k] & (x1[:, k] <= player_x) & (player_x <= x2[:, k])
+            if not hit.any():
+                continue
+            with np.errstate(divide="ignore", invalid="ignore"):
+                t = (player_x - x1[:, k]) / (x2[:, k] - x1[:, k])
+                wall_y = np.where(np.abs(x2[:, k] - x1[:, k]) < 0.001,
+                                  y1[:, k], y1[:, k] + t * (y2[:, k] - y1[:, k]))
+
+            hit_top = hit & (top[:, k] == 1) & (self.y <= wall_y)
+            hit_bottom = hit & (top[:, k] == 0) & (self.y + self.player_height >= wall_y)
+            self.y = np.where(hit_top, round_rect(wall_y + 1), self.y)
+            self.y = np.where(hit_bottom, round_rect(wall_y - 1) - self.player_height, self.y)
+            self.last_wall_top = np.where(hit_top, True, np.where(hit_bottom, False, self.last_wall_top))
+            bounced = hit_top | hit_bottom
+            self.angle = np.where(bounced, 0, self.angle)
+            self.dy = np.where(bounced, 0.0, self.dy)
+
+    def check_obstacle_collisions(self, alive):
+        player_x = (self.player_center_x + self.camera_x).astype(np.float64)
+        center_y = self.y + self.player_height // 2
+        camera_x = self.camera_x.astype(np.float64)
+        x_min = player_x - self.player_size
+        x_max = player_x + self.player_size
+
+        rows, index, mask = self.spikes.near(x_min, x_max)
+        hit = spike_collision(self.spikes.column("x", rows, index), self.spikes.column("y", rows, index),
+                              self.spikes.column("size", rows, index), camera_x[:, None],
+                              self.player_center_x, center_y[:, None], self.player_size)
+        dead = (hit & mask).any(axis=1)
+
+        rows, index, mask = self.angled_walls.near(x_min, x_max)
+        column = lambda name: self.angled_walls.column(name, rows, index)
+        hit = line_circle_collision(column("x1") - camera_x[:, None], column("y1"),
+                                    column("x2") - camera_x[:, None], column("y2"),
+                                    self.player_center_x, center_y[:, None], self.player_size)
+        dead |= (hit & mask).any(axis=1)
+
+        self.game_over |= alive & dead
@@ -0,0 +1,175 @@
+import os
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")  # Runs without a window
+
+import argparse
+import json
+import platform
+import statistics
+import sys
+import time
+import pygame
+from game import Game
+from render import create_backend
+
+# Reproducible benchmarks for the hot paths in game.py and sprites.py.
+# Every scenario uses fixed seeds and a scripted input pattern, so two runs
+# on the same machine do exactly the same work. Results are written as JSON
+# and can be compared against a stored baseline:
+#
+#   python bench.py --save-baseline bench_baseline.json
+#   python bench.py --baseline bench_baseline.json
+#
+# The comparison exits with status 1 when a metric got slower than the
+# allowed tolerance, so it can run before every release.
+
+SCENARIOS = [
+    # name, resolution, wall_segments, spikes_per_segment
+    ("default", (800, 600), None, 0.5),
+    ("short level", (800, 600), 20, 0.5),
+    ("long level", (800, 600), 100000, 0.5),
+    ("many spikes", (800, 600), None, 4),
+    ("720p", (1280, 720), None, 0.5),
+    ("1080p", (1920, 1080), None, 0.5),
+]
+
+# Reported, but not checked against the baseline: the first frame races the
+# level builder thread, so it depends on thread scheduling more than on the code
+UNCHECKED_METRICS = {"first_frame_ms"}
+FIRST_FRAME_RUNS = 5  # first_frame_ms is the median of this many starts
+
+def scripted_input(frame):
+    # Hold the mouse for 20 frames, release it for 20 frames
+    return frame % 40 < 20
+
+def median_ms(samples):
+    return statistics.median(samples) * 1000 if samples else 0.0
+
+def first_frame_time(screen, width, height, seed, wall_segments, spikes_per_segment):
+    # Time to first frame the way main.py starts: the level is built while the first frame is shown
+    start = time.perf_counter()
+    game = Game(width, height, seed=seed, wall_segments=wall_segments,
+                spikes_per_segment=spikes_per_segment, defer_level=True)
+    screen.present(game.draw(screen))
+    elapsed = time.perf_counter() - start
+
+    # The first update waits for the level and starts building the next
+    # one, wait for that too so no builder thread outlives the measurement
+    game.update()
+    game.next_level.result()
+    return elapsed
+
+def bench_scenario(resolution, wall_segments, spikes_per_segment, frames, seed, backend):
+    width, height = resolution
+    screen = create_backend(backend, resolution, "bench")
+
+    # Startup: building the game including its first level and cached layers
+    start = time.perf_counter()
+    game = Game(width, height, seed=seed, wall_segments=wall_segments,
+                spikes_per_segment=spikes_per_segment)
+    startup = time.perf_counter() - start
+    game.next_level.result()  # The next level is built in the background, keep it out of the timings below
+
+    first_frame = statistics.median(
+        first_frame_time(screen, width, height, seed, wall_segments, spikes_per_segment)
+        for _ in range(FIRST_FRAME_RUNS))
+
+    update_times = []
+    draw_times = []
+    present_times = []
+    for frame in range(frames):
+        if game.game_over:
+            game.reset()
+
+        start = time.perf_counter()
+        game.step(scripted_input(frame))
+        update_times.append(time.perf_counter() - start)
+
+        start = time.perf_counter()
+        dirty = game.draw(screen)
+        draw_times.append(time.perf_counter() - start)
+
+        start = time.perf_counter()
+        screen.present(dirty)
+        present_times.append(time.perf_counter() - start)
+
+    # Restarts, each one after the next level had time to build in the background
+    reset_times = []
+    for _ in range(5):
+        if game.next_level is not None:
+            game.next_level.result()
+        start = time.perf_counter()
+        game.reset()
+        reset_times.append(time.perf_counter() - start)
+    game.next_level.result()  # The last reset started another builder
+
+    return {
+        "startup_ms": startup * 1000,
+        "first_frame_ms": first_frame * 1000,
+        "update_ms": median_ms(update_times),
+        "draw_ms": median_ms(draw_times),
+        "present_ms": median_ms(present_times),
+        "reset_ms": min(reset_times) * 1000,  # Fastest, a reset races the builder thread it starts
+    }
+
+def run(frames, repeats, seed, backend="software"):
+    results = {}
+    for name, resolution, wall_segments, spikes_per_segment in SCENARIOS:
+        # Keep the fastest of the repeats, it has the least noise from the machine
+        runs = [bench_scenario(resolution, wall_segments, spikes_per_segment, frames, seed, backend)
+                for _ in range(repeats)]
+        results[name] = {metric: min(run[metric] for run in runs) for metric in runs[0]}
+        print(f"{name:<12} " + "  ".join(f"{metric} {value:8.3f}" for metric, value in results[name].items()
+                                         if metric.endswith("_ms")))
+    return results
+
+def compare(results, baseline, tolerance):
+    # Return the metrics that got slower than the baseline allows
+    regressions = []
+    for name, metrics in results.items():
+        for metric, value in metrics.items():
+            if not metric.endswith("_ms") or metric in UNCHECKED_METRICS:
+                continue
+            old = baseline.get(name, {}).get(metric)
+            # Tiny timings are mostly noise, ignore changes below 10 microseconds
+            if old is not None and value > old * (1 + tolerance) and value - old > 0.01:
+                regressions.append((name, metric, old, value))
+    return regressions
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the game's update and draw paths")
+    parser.add_argument("--frames", type=int, default=600)
+    parser.add_argument("--repeats", type=int, default=3)
+    parser.add_argument("--seed", type=int, default=1234)
+    parser.add_argument("--output", default="bench_results.json")
+    parser.add_argument("--baseline", help="compare against this results file")
+    parser.add_argument("--save-baseline", help="also write the results to this file")
+    parser.add_argument("--backend", choices=["software", "textures"], default="software")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="allowed slowdown, 0.25 is 25%%")
+    args = parser.parse_args()
+
+    pygame.display.init()
+    pygame.font.init()
+    results = {
+        "machine": {"python": platform.python_version(), "pygame": pygame.version.ver,
+                    "platform": platform.platform()},
+        "settings": {"frames": args.frames, "repeats": args.repeats, "seed": args.seed,
+                     "backend": args.backend},
+        "scenarios": run(args.frames, args.repeats, args.seed, args.backend),
+    }
+
+    for path in filter(None, [args.output, args.save_baseline]):
+        with open(path, "w") as f:
+            json.dump(results, f, indent=2)
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        regressions = compare(results["scenarios"], baseline["scenarios"], args.tolerance)
+        for name, metric, old, new in regressions:
+            print(f"REGRESSION {name} {metric}: {old:.3f} ms -> {new:.3f} ms")
+        if regressions:
+            sys.exit(1)
+        print("No regressions against", args.baseline)
+
+if __name__ == "__main__":
+    main()
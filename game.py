@@ -1,197 +1,352 @@
 import pygame
-import random
 import math
-from sprites import Player, Spike, Wall
+import random
+from sprites import Player, Spike
+from animation import Art
+from particles import ParticlePool
+from audio import Audio
+from geometry import line_circle_collision, swept_circle_point, swept_circle_segment
+from level import Level, LevelBuilder
+from layers import BackgroundLayer, TerrainLayer, TextLabel
+from profiler import FrameProfiler
+
+# Fonts come straight from pygame's bundled default font. SysFont(None, ...)
+# ends up with the same font, but only after scanning every installed font.
+fonts = {}
+
+def load_font(size):
+    if size not in fonts:
+        fonts[size] = pygame.font.Font(None, size)
+    return fonts[size]
+
+def refresh_image(screen, image, area=None):
+    # Tell a render backend that an image it may have uploaded has changed.
+    # A plain Surface reads the current pixels on every blit and has no refresh().
+    refresh = getattr(screen, "refresh", None)
+    if refresh is not None:
+        refresh(image, area)
 
 class Game:
-    def __init__(self, screen_width, screen_height):
+    def __init__(self, screen_width, screen_height, headless=False, seed=None, wall_segments=None,
+                 spikes_per_segment=0.5, profiler=None, level_source=None, defer_level=False, audio=None,
+                 level_seed=None, check_reachable=True):
         self.screen_width = screen_width
         self.screen_height = screen_height
+        self.headless = headless  # No display, font or drawing (bots and level tests)
+        self.random = random.Random(seed)
+        self.frame = 0
+        self.profiler = profiler or FrameProfiler()  # Disabled unless one is passed in
+        self.audio = audio or Audio()  # Silent unless one is passed in
         self.camera_x = 0
         self.score = 0
         self.high_score = 0
         self.game_over = False
+        self.death_cause = None
         self.game_speed = 3
         
-        # Create sprite groups
-        self.all_sprites = pygame.sprite.Group()
-        self.obstacles = pygame.sprite.Group()
-        self.walls = pygame.sprite.Group()
-        self.flat_walls = pygame.sprite.Group()
-        self.angled_walls = pygame.sprite.Group()
-        self.spikes = pygame.sprite.Group()
-        
         # Initialize player
         self.player = Player(100, screen_height // 2)
-        self.all_sprites.add(self.player)
-        
-        # Create walls and obstacles
-        self.wall_segments = 20
-        self.wall_segment_width = 200
-        self.generate_walls()
-        self.generate_spikes()
         
-        # Set up fonts
-        self.font = pygame.font.SysFont(None, 36)
+        # State before the last update, drawing interpolates from it
+        self.previous_camera_x = self.camera_x
+        self.previous_player_y = self.player.rect.y
         
         # Colors
         self.bg_color = (180, 0, 0)  # Dark red background
+        self.grid_color = (150, 0, 0)
         self.wall_color = (255, 0, 0)  # Brighter red for walls
         self.text_color = (255, 255, 255)  # White text
         
+        # Cached background, headless games never draw so they do not need it
+        self.background = None if headless else BackgroundLayer(
+            screen_width, screen_height, self.bg_color, self.grid_color)
+        
+        # Create walls and obstacles
+        self.wall_segments = wall_segments  # Level length in chunks, None streams forever
+        self.spikes_per_segment = spikes_per_segment
+        self.level_source = level_source  # Optional LevelFile, every run then plays that level
+        self.check_reachable = check_reachable  # Re-roll generated chunks the player cannot get through
+        self.next_level = None  # LevelBuilder working on the level after this one
+        # The first level comes from level_seed when given (e.g. to play a
+        # replay), otherwise its seed is drawn from the game's RNG like any other
+        if defer_level and not headless:
+            # Build the first level on a worker thread so the window can show
+            # its first frame right away, the first update picks the level up
+            self.level = None
+            self.next_level = LevelBuilder(*self.level_settings(level_seed))
+        else:
+            self.generate_walls(level_seed)
+        
+        # Set up fonts (headless games never draw, so they skip the font system)
+        self.font = None if headless else load_font(36)
+        if not headless:
+            self.score_label = TextLabel(self.font, self.text_color)
+            self.high_score_label = TextLabel(self.font, self.text_color)
+            self.game_over_label = TextLabel(self.font, self.text_color)
+            self.art = Art(self.player.size, self.player.color, Spike.color, Spike.outline_color)
+            self.atlas_version = self.art.atlas.version  # Atlas version the screen has last seen
+        self.particles = None if headless else ParticlePool(screen_width, screen_height)
+        self.game_over_drawn = False  # The game-over screen is still, it is drawn only once
+        
         # Gameplay state
         self.last_wall_hit = "bottom"  # or "top"
         self.is_mouse_down = False
+        self.input_log = []  # (frame, mouse down) for every press and release, for replays
+        self.effects = []  # (x, y, frame) of bounces still showing their effect
     
-    def generate_walls(self):
-        self.top_wall_points = []
-        self.bottom_wall_points = []
-        
-        # Generate the zigzag patterns for top and bottom walls
-        for i in range(self.wall_segments):
-            x = i * self.wall_segment_width
-            
-            # Top wall
-            top_y_start = random.randint(100, 200)
-            top_points = self.generate_zigzag(x, top_y_start, self.wall_segment_width, 50, "top")
-            self.top_wall_points.extend(top_points)
-            
-            # Bottom wall
-            bottom_y_start = random.randint(self.screen_height - 200, self.screen_height - 100)
-            bottom_points = self.generate_zigzag(x, bottom_y_start, self.wall_segment_width, 50, "bottom")
-            self.bottom_wall_points.extend(bottom_points)
-        
-        # Create wall segments
-        self.create_wall_segments(self.top_wall_points, "top")
-        self.create_wall_segments(self.bottom_wall_points, "bottom")
-    
-    def create_wall_segments(self, points, wall_type):
-        for i in range(len(points) - 1):
-            x1, y1 = points[i]
-            x2, y2 = points[i + 1]
-            
-            # Check if this is a horizontal segment (flat)
-            is_flat = abs(y2 - y1) < 5
-            
-            # Create a wall segment
-            wall = Wall(x1, y1, x2, y2, is_flat, wall_type)
-            self.walls.add(wall)
-            self.all_sprites.add(wall)
-            
-            # Add wall to appropriate group
-            if is_flat:
-                self.flat_walls.add(wall)
-            else:
-                self.angled_walls.add(wall)
-                self.obstacles.add(wall)  # Angled walls are obstacles
-    
-    def generate_zigzag(self, start_x, start_y, width, height, wall_type):
-        points = []
-        segments = 4
-        segment_width = width / segments
-        
-        for i in range(segments + 1):
-            x = start_x + i * segment_width
-            
-            # Alternate high and low points
-            if i % 2 == 0:
-                y = start_y
-            else:
-                if wall_type == "top":
-                    y = start_y + height
-                else:
-                    y = start_y - height
-            
-            points.append((x, y))
+    def generate_walls(self, level_seed=None):
+        # Start a new level, every level gets its own seed so it can be rebuilt.
+        # The level after this one is built in the background right away,
+        # headless games restart cheaply enough without an extra thread.
+        if level_seed is not None:
+            self.level = Level(*self.level_settings(level_seed))
+        elif self.next_level is not None:
+            self.level = self.next_level.result()
+            self.next_level = None
+        else:
+            self.level = Level(*self.level_settings())
         
-        return points
+        if not self.headless and self.next_level is None:
+            self.next_level = LevelBuilder(*self.level_settings())
     
-    def generate_spikes(self):
-        # Create some spike obstacles between the walls
-        for i in range(10):
-            x = random.randint(500, self.wall_segments * self.wall_segment_width - 500)
-            
-            # Find safe y range between walls
-            top_y = 200  # Minimum safe distance from top
-            bottom_y = self.screen_height - 200  # Minimum safe distance from bottom
-            
-            if bottom_y - top_y > 80:  # Make sure there's enough room
-                y = random.randint(top_y, bottom_y)
-                spike = Spike(x, y, 30)
-                self.spikes.add(spike)
-                self.obstacles.add(spike)
-                self.all_sprites.add(spike)
+    def level_settings(self, seed=None):
+        # Arguments for Level, drawing the next level seed from the game's RNG
+        if seed is None:
+            seed = self.random.getrandbits(32)
+        terrain = None if self.headless else TerrainLayer(self.screen_height, self.wall_color)
+        return (self.screen_width, self.screen_height, seed, self.wall_segments,
+                self.spikes_per_segment, terrain, self.level_source, self.check_reachable)
     
     def update(self):
         if self.game_over:
+            if self.particles is not None:
+                self.particles.update()  # The crash keeps flying on the game-over screen
             return
         
+        if self.level is None:
+            self.generate_walls()  # Deferred first level
+        
+        self.previous_camera_x = self.camera_x
+        self.previous_player_y = self.player.rect.y
+        self.frame += 1
+        
         # Update camera position - this controls the player's x movement
         self.camera_x += self.game_speed
+        with self.profiler.section("level"):
+            self.level.update(self.camera_x)
         
         # Update player
         self.player.update()
         
         # Handle wall and obstacle collisions
-        self.handle_wall_collisions()
-        self.check_obstacle_collisions()
+        with self.profiler.section("wall collisions"):
+            self.handle_wall_collisions()
+        with self.profiler.section("obstacle hits"):
+            self.check_obstacle_collisions()
         
         # Keep player within reasonable horizontal bounds
         if self.player.rect.left < 50:
             self.player.rect.left = 50
-            self.handle_game_over()  # Player too far left
+            self.handle_game_over("left edge")  # Player too far left
         elif self.player.rect.right > self.screen_width - 50:
             self.player.rect.right = self.screen_width - 50
         
         # Update score
-        self.score = int(self.camera_x / 10)
+        self.update_score()
         
         # Update player angle based on mouse state
         self.update_player_angle()
+        
+        if self.particles is not None:
+            self.particles.update()
+    
+    def update_score(self):
+        score = int(self.camera_x / 10)
+        if score // 100 > self.score // 100:
+            self.audio.play("milestone")  # Every 100m
+        self.score = score
     
     def handle_wall_collisions(self):
         player_adjusted_x = self.player.rect.centerx + self.camera_x
         
-        # Check for collisions with flat walls
-        for wall in self.flat_walls:
-            if wall.x1 <= player_adjusted_x <= wall.x2:
+        segments = self.level.segments
+        
+        # Check for collisions with flat walls under the player
+        for segment in self.level.flat_wall_index.query(player_adjusted_x, player_adjusted_x):
+            x1, y1, x2, y2 = segments.line(segment)
+            if x1 <= player_adjusted_x <= x2:
                 # Calculate wall y at player's x position
-                if abs(wall.x2 - wall.x1) < 0.001:
-                    wall_y = wall.y1
+                if abs(x2 - x1) < 0.001:
+                    wall_y = y1
                 else:
-                    t = (player_adjusted_x - wall.x1) / (wall.x2 - wall.x1)
-                    wall_y = wall.y1 + t * (wall.y2 - wall.y1)
+                    t = (player_adjusted_x - x1) / (x2 - x1)
+                    wall_y = y1 + t * (y2 - y1)
                 
                 # Check if player is colliding with this wall
-                if wall.wall_type == "top" and self.player.rect.top <= wall_y:
+                is_top = segments.is_top(segment)
+                if is_top and self.player.rect.top <= wall_y:
                     self.player.rect.top = wall_y + 1
                     self.player.bounce("top")
                     self.last_wall_hit = "top"
-                    
-                elif wall.wall_type == "bottom" and self.player.rect.bottom >= wall_y:
+                    self.bounce_effect(player_adjusted_x, wall_y, math.pi / 2)
+                
+                elif not is_top and self.player.rect.bottom >= wall_y:
                     self.player.rect.bottom = wall_y - 1
                     self.player.bounce("bottom")
                     self.last_wall_hit = "bottom"
+                    self.bounce_effect(player_adjusted_x, wall_y, -math.pi / 2)
+    
+    def bounce_effect(self, x, y, direction):
+        # Sound, plus ring and sparks where the player bounced when drawing (sparks fly in direction)
+        self.audio.play("bounce")
+        if not self.headless:
+            self.effects.append((x, y, self.frame))
+            self.particles.emit(30, x, y, self.text_color, speed=2.5, lifetime=25,
+                                direction=direction, spread=math.pi)
     
     def check_obstacle_collisions(self):
+        # Only obstacles that overlap the player horizontally can hit it
+        player_adjusted_x = self.player.rect.centerx + self.camera_x
+        x_min = player_adjusted_x - self.player.size
+        x_max = player_adjusted_x + self.player.size
+        
         # Check for collisions with spikes
-        for spike in self.spikes:
-            spike.screen_x = self.camera_x
-            if spike.check_collision(self.player):
-                self.handle_game_over()
+        for spike in self.level.spike_index.query(x_min, x_max):
+            if spike.check_collision(self.player, self.camera_x):
+                self.handle_game_over("spike")
                 return
         
-        # Check for collisions with angled walls
-        for wall in self.angled_walls:
-            wall.screen_x = self.camera_x
-            if wall.check_collision(self.player):
-                self.handle_game_over()
+        # Check for collisions with angled walls, in screen coordinates
+        segments = self.level.segments
+        for segment in self.level.angled_wall_index.query(x_min, x_max):
+            x1, y1, x2, y2 = segments.line(segment)
+            if line_circle_collision(x1 - self.camera_x, y1, x2 - self.camera_x, y2,
+                                     self.player.rect.centerx, self.player.rect.centery,
+                                     self.player.size):
+                self.handle_game_over("wall")
                 return
     
+    def step(self, mouse_down=False):
+        # Advance exactly one frame with the given mouse button state.
+        # This is the display-free way to drive the game (see headless.py).
+        self.set_mouse_down(mouse_down)
+        self.update()
+        return self.game_over
+    
+    def advance(self, frames, mouse_down=False):
+        # Same as calling step(mouse_down) frames times. Stretches in which
+        # the player provably touches nothing are simulated in one go, only
+        # frames with a possible contact run through update(). Lets bots and
+        # headless runs act every few frames at a fraction of the cost.
+        self.set_mouse_down(mouse_down)
+        while frames > 0 and not self.game_over:
+            free = self.free_frames(frames) if frames > 1 else 0  # A single frame is cheaper to just update
+            if free:
+                self.skip_frames(free)
+                frames -= free
+            if frames:
+                self.update()
+                frames -= 1
+        return self.game_over
+    
+    def free_frames(self, frames):
+        # How many of the next frames (at most frames) touch no wall, spike or
+        # screen edge. Every frame moves the player game_speed to the right
+        # and the same whole number of pixels up or down, so its path is a
+        # straight line and swept tests give the time of the first contact.
+        player = self.player
+        rect = player.rect
+        if player.angle != self.player_angle() or rect.left < 50 or rect.right > self.screen_width - 50:
+            return 0
+        
+        # Stay within the generated part of the level and the screen bounds of Player.update
+        step_y = self.player_step()
+        frames = min(frames, (self.screen_width - rect.right) // self.game_speed)
+        if step_y < 0:
+            frames = min(frames, rect.top // -step_y)
+        elif step_y > 0:
+            frames = min(frames, (600 - rect.bottom) // step_y)
+        if frames <= 0:
+            return 0
+        
+        x = rect.centerx + self.camera_x
+        y = rect.centery
+        vx = self.game_speed * frames
+        vy = step_y * frames
+        hits = []
+        for spike in self.level.spike_index.query(x - player.size, x + vx + player.size):
+            hits.append(swept_circle_point(x, y, vx, vy, spike.size * 0.7 + player.size, spike.x, spike.y))
+        segments = self.level.segments
+        for segment in self.level.angled_wall_index.query(x - player.size, x + vx + player.size):
+            hits.append(swept_circle_segment(x, y, vx, vy, player.size, *segments.line(segment)))
+        for segment in self.level.flat_wall_index.query(x, x + vx):
+            hits.append(self.flat_wall_contact(segment, x, vx, vy))
+        hits = [t for t in hits if t is not None]
+        if not hits:
+            return frames
+        
+        # Frames strictly before the first contact are free, the margin keeps
+        # rounding errors from letting the frame of the contact through
+        return max(0, min(frames, math.ceil(min(hits) * frames - 1e-6) - 1))
+    
+    def flat_wall_contact(self, segment, x, vx, vy):
+        # Time of the first bounce off a flat wall during a move, the
+        # continuous version of the test in handle_wall_collisions
+        x1, y1, x2, y2 = self.level.segments.line(segment)
+        if vx <= 0:
+            return None
+        t_start = max(0.0, (x1 - x) / vx)
+        t_end = min(1.0, (x2 - x) / vx)
+        if t_start > t_end:
+            return None
+        
+        def gap(t):
+            # Distance left between the player and the wall, hit when <= 0
+            if abs(x2 - x1) < 0.001:
+                wall_y = y1
+            else:
+                wall_y = y1 + (x + vx * t - x1) / (x2 - x1) * (y2 - y1)
+            if self.level.segments.is_top(segment):
+                return self.player.rect.top + vy * t - wall_y
+            return wall_y - (self.player.rect.bottom + vy * t)
+        
+        gap_start = gap(t_start)
+        gap_end = gap(t_end)
+        if gap_start <= 0:
+            return t_start
+        if gap_end > 0:
+            return None
+        return t_start + (t_end - t_start) * gap_start / (gap_start - gap_end)
+    
+    def skip_frames(self, frames):
+        # Simulate frames that free_frames found free of contacts
+        step_y = self.player_step()
+        self.frame += frames
+        self.camera_x += self.game_speed * frames
+        with self.profiler.section("level"):
+            self.level.update(self.camera_x)
+        self.player.rect.y += step_y * frames
+        self.update_score()
+        self.previous_camera_x = self.camera_x - self.game_speed
+        self.previous_player_y = self.player.rect.y - step_y
+    
+    def player_step(self):
+        # Pixels the player moves down in the next update, the rect keeps whole pixels
+        moved = self.player.rect.move(0, 0)
+        moved.y += self.player.dy
+        return moved.y - self.player.rect.y
+    
+    def set_mouse_down(self, mouse_down):
+        if mouse_down and not self.is_mouse_down:
+            self.handle_mouse_down()
+        elif not mouse_down and self.is_mouse_down:
+            self.handle_mouse_up()
+    
     def handle_mouse_down(self):
         if self.game_over:
             return
         
+        self.input_log.append((self.frame, True))
         self.is_mouse_down = True
         self.update_player_angle()
     
@@ -199,112 +354,141 @@ class Game:
         if self.game_over:
             return
         
+        self.input_log.append((self.frame, False))
         self.is_mouse_down = False
         self.update_player_angle()
-
+    
     def update_player_angle(self):
+        self.player.change_angle(self.player_angle())
+    
+    def player_angle(self):
         # Apply the new angle logic based on mouse state and last wall hit
         if self.last_wall_hit == "bottom":
             if self.is_mouse_down:
                 # When clicking after hitting bottom wall, go up 60 degrees to the left
-                self.player.change_angle(-60)
+                return -60
             else:
                 # When releasing after hitting bottom wall, mirror the movement (go up 60 degrees to the right)
-                self.player.change_angle(60)  # Mirror angle on the other side
+                return 60  # Mirror angle on the other side
         else:  # top wall
             if self.is_mouse_down:
                 # When clicking after hitting top wall, go down 60 degrees to the left
-                self.player.change_angle(120)  # 120° is down and to the left
+                return 120  # 120° is down and to the left
             else:
                 # When releasing after hitting top wall, go down 60 degrees to the right
-                self.player.change_angle(60)  # 60° is down and to the right
-    def draw(self, screen):
-        # Draw background
-        screen.fill(self.bg_color)
+                return 60  # 60° is down and to the right
+    
+    def draw(self, screen, alpha=1.0):
+        # Returns the parts of the screen that changed, for pygame.display.update.
+        # alpha says how far the clock is from the last update towards the next
+        # one (0 to 1). Camera and player are drawn that far between their
+        # previous and current positions, so motion stays smooth at any frame rate.
+        if self.headless or (self.game_over and self.game_over_drawn):
+            return []  # Still game-over screen
+        
+        profiler = self.profiler
+        if self.game_over:
+            alpha = 1.0  # The game-over screen stands still
+        camera_x = round(self.previous_camera_x + (self.camera_x - self.previous_camera_x) * alpha)
+        player_offset = round((self.previous_player_y - self.player.rect.y) * (1 - alpha))
+        
+        # Everything visible is collected first and then drawn with a single
+        # blits() call. Player, spikes and effects all come from one atlas.
+        art = self.art
+        batch = self.background.sprites()
+        
+        # Walls and the spikes that are on screen (once the first level is built)
+        if self.level is not None:
+            with profiler.section("walls"):
+                batch.extend(self.level.terrain.sprites(camera_x, self.screen_width))
+            
+            with profiler.section("spikes"):
+                for spike in self.level.spike_index.query(camera_x, camera_x + self.screen_width):
+                    batch.append(art.spike_sprite(spike, self.frame, camera_x))
+        
+        # Bounce effects, finished ones are dropped
+        self.effects = [effect for effect in self.effects if self.frame - effect[2] < art.bounce.frames]
+        for x, y, start in self.effects:
+            batch.append(art.sprite(art.bounce, self.frame - start, x - camera_x, y))
         
-        # Draw a grid pattern
-        self.draw_grid_pattern(screen)
+        # Player
+        batch.append(art.player_sprite(self.player, self.frame, player_offset))
         
-        # Draw walls (using the points)
-        self.draw_walls(screen)
+        with profiler.section("particles"):
+            for image, position, area in self.particles.sprites(camera_x):
+                refresh_image(screen, image, area)
+                batch.append((image, position, area))
         
-        # Draw spikes
-        for spike in self.spikes:
-            spike.draw(screen, self.camera_x)
+        with profiler.section("hud"):
+            self.draw_hud(batch)
         
-        # Draw player
-        self.player.draw(screen)
+        # Spike frames are added to the atlas the first time a size shows up,
+        # a texture of the atlas has to be uploaded again after that
+        if art.atlas.version != self.atlas_version:
+            refresh_image(screen, art.atlas.surface)
+            self.atlas_version = art.atlas.version
         
+        with profiler.section("blits"):
+            screen.blits(batch, doreturn=False)
+        
+        # The game-over screen is still once the last particles are gone
+        self.game_over_drawn = self.game_over and not len(self.particles)
+        return [screen.get_rect()]
+    
+    def invalidate(self):
+        # Draw everything again next frame, for when something else drew over the screen
+        self.game_over_drawn = False
+    
+    def draw_hud(self, batch):
         # Draw score
-        score_text = self.font.render(f"{self.score}m", True, self.text_color)
-        screen.blit(score_text, (self.screen_width // 2 - score_text.get_width() // 2, 20))
+        score_text = self.score_label.render(f"{self.score}m")
+        batch.append((score_text, (self.screen_width // 2 - score_text.get_width() // 2, 20)))
         
         # Draw high score
-        high_score_text = self.font.render(f"highscore: {self.high_score}m", True, self.text_color)
-        screen.blit(high_score_text, (self.screen_width - high_score_text.get_width() - 20, 20))
+        high_score_text = self.high_score_label.render(f"highscore: {self.high_score}m")
+        batch.append((high_score_text, (self.screen_width - high_score_text.get_width() - 20, 20)))
         
         # Draw game over message
         if self.game_over:
-            game_over_text = self.font.render("Game Over! Press SPACE to restart", True, self.text_color)
-            screen.blit(game_over_text, (self.screen_width // 2 - game_over_text.get_width() // 2, 
-                                        self.screen_height // 2))
-    
-    def draw_grid_pattern(self, screen):
-        # Draw a grid pattern
-        grid_size = 20
-        for x in range(0, self.screen_width, grid_size):
-            for y in range(0, self.screen_height, grid_size):
-                pygame.draw.line(screen, (150, 0, 0), (x, 0), (x, self.screen_height), 1)
-                pygame.draw.line(screen, (150, 0, 0), (0, y), (self.screen_width, y), 1)
+            game_over_text = self.game_over_label.render("Game Over! Press SPACE to restart")
+            batch.append((game_over_text, (self.screen_width // 2 - game_over_text.get_width() // 2, 
+                                          self.screen_height // 2)))
     
-    def draw_walls(self, screen):
-        # Draw top wall
-        adjusted_top_wall = [(x - self.camera_x, y) for x, y in self.top_wall_points]
-        if len(adjusted_top_wall) > 1:
-            pygame.draw.lines(screen, self.wall_color, False, adjusted_top_wall, 3)
-            
-            # Fill the area above the top wall
-            polygon_points = adjusted_top_wall.copy()
-            polygon_points.insert(0, (adjusted_top_wall[0][0], 0))
-            polygon_points.append((adjusted_top_wall[-1][0], 0))
-            pygame.draw.polygon(screen, self.wall_color, polygon_points)
-        
-        # Draw bottom wall
-        adjusted_bottom_wall = [(x - self.camera_x, y) for x, y in self.bottom_wall_points]
-        if len(adjusted_bottom_wall) > 1:
-            pygame.draw.lines(screen, self.wall_color, False, adjusted_bottom_wall, 3)
-            
-            # Fill the area below the bottom wall
-            polygon_points = adjusted_bottom_wall.copy()
-            polygon_points.insert(0, (adjusted_bottom_wall[0][0], self.screen_height))
-            polygon_points.append((adjusted_bottom_wall[-1][0], self.screen_height))
-            pygame.draw.polygon(screen, self.wall_color, polygon_points)
-    
-    def handle_game_over(self):
+    def handle_game_over(self, cause):
+        # cause is "spike", "wall" (an angled wall) or "left edge"
+        if not self.game_over:
+            self.death_cause = cause
+            self.audio.play("death")
+            if self.particles is not None:
+                # The player bursts, in the color of what killed it
+                color = {"spike": Spike.color, "wall": self.wall_color}.get(cause, self.text_color)
+                self.particles.emit(400, self.player.rect.centerx + self.camera_x, self.player.rect.centery,
+                                    color, speed=5, lifetime=70)
+                self.particles.emit(150, self.player.rect.centerx + self.camera_x, self.player.rect.centery,
+                                    self.player.color, speed=3, lifetime=50)
         self.game_over = True
         if self.score > self.high_score:
             self.high_score = self.score
     
-    def reset(self):
+    def reset(self, level_seed=None):
         # Reset game state
         self.camera_x = 0
         self.score = 0
+        self.frame = 0
         self.game_over = False
+        self.death_cause = None
+        self.game_over_drawn = False
         self.last_wall_hit = "bottom"
         self.is_mouse_down = False
-        
-        # Clear sprite groups
-        self.all_sprites.empty()
-        self.obstacles.empty()
-        self.walls.empty()
-        self.flat_walls.empty()
-        self.angled_walls.empty()
-        self.spikes.empty()
+        self.input_log = []
+        self.effects = []
+        if self.particles is not None:
+            self.particles.clear()
         
         # Create new player
         self.player = Player(100, self.screen_height // 2)
-        self.all_sprites.add(self.player)
+        self.previous_camera_x = self.camera_x
+        self.previous_player_y = self.player.rect.y
         
-        # Regenerate walls and spikes
-        self.generate_walls()
-        self.generate_spikes()
\ No newline at end of file
+        # Regenerate walls and spikes, a given seed rebuilds that exact level
+        self.generate_walls(level_seed)
\ No newline at end of file
@@ -0,0 +1,137 @@
+import math
+from array import array
+
+# Level geometry without sprites: wall segments live in flat typed arrays
+# instead of one pygame Surface, Rect and sprite per segment, plus the
+# collision tests used on them.
+
+def line_circle_collision(line_x1, line_y1, line_x2, line_y2, circle_x, circle_y, radius):
+    # Calculate vector from line start to circle center
+    dx = circle_x - line_x1
+    dy = circle_y - line_y1
+
+    # Calculate line segment vector
+    line_dx = line_x2 - line_x1
+    line_dy = line_y2 - line_y1
+
+    # Calculate length of line segment squared
+    length_squared = line_dx**2 + line_dy**2
+    if length_squared == 0:
+        return False  # Line segment is actually a point
+
+    # Calculate dot product
+    dot_product = dx*line_dx + dy*line_dy
+
+    # Calculate projection ratio (how far along the line the closest point is)
+    t = max(0, min(1, dot_product / length_squared))
+
+    # Calculate closest point on line to circle center
+    closest_x = line_x1 + t * line_dx
+    closest_y = line_y1 + t * line_dy
+
+    # Calculate distance from circle center to closest point
+    distance = math.sqrt((circle_x - closest_x)**2 + (circle_y - closest_y)**2)
+
+    # Return True if distance is less than circle radius
+    return distance <= radius
+
+# Swept tests: a circle moves from (x, y) to (x + vx, y + vy). They return the
+# time of impact, the earliest t in [0, 1] at which the circle touches the
+# other object, or None if it never does during the move.
+
+def swept_circle_point(x, y, vx, vy, radius, point_x, point_y):
+    dx = x - point_x
+    dy = y - point_y
+    c = dx*dx + dy*dy - radius*radius
+    if c <= 0:
+        return 0.0  # Already touching
+    a = vx*vx + vy*vy
+    b = dx*vx + dy*vy
+    if a == 0 or b >= 0:
+        return None  # Not moving, or moving away
+    discriminant = b*b - a*c
+    if discriminant < 0:
+        return None
+    t = (-b - math.sqrt(discriminant)) / a
+    return t if t <= 1 else None
+
+def swept_circle_segment(x, y, vx, vy, radius, line_x1, line_y1, line_x2, line_y2):
+    line_dx = line_x2 - line_x1
+    line_dy = line_y2 - line_y1
+    length_squared = line_dx**2 + line_dy**2
+    if length_squared == 0:
+        return swept_circle_point(x, y, vx, vy, radius, line_x1, line_y1)
+
+    # First contact with the inside of the segment: the circle center gets
+    # within radius of the line while its projection is on the segment
+    length = math.sqrt(length_squared)
+    distance = ((x - line_x1)*line_dy - (y - line_y1)*line_dx) / length
+    approach = (vx*line_dy - vy*line_dx) / length
+    if abs(distance) <= radius:
+        t = 0.0
+    elif approach != 0 and (distance > 0) != (approach > 0):
+        t = (abs(distance) - radius) / abs(approach)
+    else:
+        t = None
+    if t is not None and t <= 1:
+        u = ((x + vx*t - line_x1)*line_dx + (y + vy*t - line_y1)*line_dy) / length_squared
+        if 0 <= u <= 1:
+            return t
+
+    # Otherwise the circle can only reach the segment over one of its ends
+    hits = [t for t in (swept_circle_point(x, y, vx, vy, radius, line_x1, line_y1),
+                        swept_circle_point(x, y, vx, vy, radius, line_x2, line_y2)) if t is not None]
+    return min(hits) if hits else None
+
+class Segments:
+    # Wall segments stored column by column. Every segment gets an id that
+    # never changes; segments are only ever appended at the end and dropped
+    # from the front (when the camera has passed them), so an id maps to
+    # the array position id - base.
+    __slots__ = ("base", "x1", "y1", "x2", "y2", "length", "angle", "flat", "top")
+
+    def __init__(self):
+        self.base = 0  # Id of the first stored segment
+        self.x1 = array("d")
+        self.y1 = array("d")
+        self.x2 = array("d")
+        self.y2 = array("d")
+        self.length = array("d")
+        self.angle = array("d")
+        self.flat = array("b")  # 1 for flat walls (the player bounces off them)
+        self.top = array("b")  # 1 for the top wall, 0 for the bottom wall
+
+    def __len__(self):
+        return len(self.x1)
+
+    @property
+    def end(self):
+        # Id the next added segment will get
+        return self.base + len(self.x1)
+
+    def add(self, x1, y1, x2, y2, is_flat, is_top):
+        self.x1.append(x1)
+        self.y1.append(y1)
+        self.x2.append(x2)
+        self.y2.append(y2)
+        self.length.append(math.sqrt((x2 - x1)**2 + (y2 - y1)**2))
+        self.angle.append(math.atan2(y2 - y1, x2 - x1))
+        self.flat.append(is_flat)
+        self.top.append(is_top)
+        return self.end - 1
+
+    def remove_before(self, segment_id):
+        # Drop every segment with an id lower than segment_id
+        count = segment_id - self.base
+        if count <= 0:
+            return
+        for column in (self.x1, self.y1, self.x2, self.y2, self.length, self.angle, self.flat, self.top):
+            del column[:count]
+        self.base = segment_id
+
+    def line(self, segment_id):
+        i = segment_id - self.base
+        return self.x1[i], self.y1[i], self.x2[i], self.y2[i]
+
+    def is_top(self, segment_id):
+        return self.top[segment_id - self.base] == 1
@@ -0,0 +1,47 @@
+import sys
+import time
+from game import Game
+
+# Fixed-step runner for playing the game without a window.
+# Every call to game.step() is one 1/60 s frame of game time, but nothing
+# waits for the clock, so games run as fast as the CPU allows.
+
+FRAMES_PER_SECOND = 60
+
+def idle_policy(game):
+    # Never press the mouse
+    return False
+
+def zigzag_policy(game):
+    # Hold the mouse for one second, release it for one second
+    return (game.frame // FRAMES_PER_SECOND) % 2 == 0
+
+def run_episode(game, policy, max_frames=60 * 60, frame_skip=1):
+    # Step the game until it is over or max_frames have been simulated.
+    # policy(game) returns True while the mouse button should be held down,
+    # it is asked every frame_skip frames and its answer held in between.
+    while not game.game_over and game.frame < max_frames:
+        game.advance(min(frame_skip, max_frames - game.frame), policy(game))
+    return game.score
+
+def main():
+    # Usage: python headless.py [episodes] [seed] [frame skip]
+    episodes = int(sys.argv[1]) if len(sys.argv) > 1 else 100
+    seed = int(sys.argv[2]) if len(sys.argv) > 2 else 0
+    frame_skip = int(sys.argv[3]) if len(sys.argv) > 3 else 1
+
+    frames = 0
+    start = time.perf_counter()
+    for episode in range(episodes):
+        game = Game(800, 600, headless=True, seed=seed + episode)
+        score = run_episode(game, zigzag_policy, frame_skip=frame_skip)
+        frames += game.frame
+        print(f"episode {episode}: {score}m in {game.frame} frames")
+    elapsed = time.perf_counter() - start
+
+    simulated = frames / FRAMES_PER_SECOND
+    print(f"{simulated:.0f} simulated seconds in {elapsed:.2f} s "
+          f"({simulated / max(elapsed, 1e-9):.0f}x real time)")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,86 @@
+import pygame
+
+# Pre-rendered layers for the parts of the screen that do not change every
+# frame. They are drawn once and then only blitted, which is a lot cheaper
+# than drawing thousands of lines and big polygons each frame.
+
+def prepare(surface):
+    # Match the display's pixel format (when there is one) for fast blits
+    if pygame.display.get_surface() is not None:
+        return surface.convert_alpha()
+    return surface
+
+class BackgroundLayer:
+    # Background color with a grid on top, drawn a single time
+    def __init__(self, width, height, bg_color, grid_color, grid_size=20):
+        self.image = pygame.Surface((width, height))
+        self.image.fill(bg_color)
+        for x in range(0, width, grid_size):
+            pygame.draw.line(self.image, grid_color, (x, 0), (x, height), 1)
+        for y in range(0, height, grid_size):
+            pygame.draw.line(self.image, grid_color, (0, y), (width, y), 1)
+        if pygame.display.get_surface() is not None:
+            self.image = self.image.convert()
+
+    def sprites(self):
+        # blits() entries for the background
+        return [(self.image, (0, 0))]
+
+class TerrainLayer:
+    # The walls of every live chunk, pre-rendered into one strip per chunk.
+    # Strips are made when a chunk is generated and dropped with the chunk,
+    # drawing is just one blit per visible strip at the camera offset.
+    def __init__(self, height, color, line_width=3):
+        self.height = height
+        self.color = color
+        self.line_width = line_width
+        self.strips = {}  # chunk index -> (world x of the strip's left edge, surface)
+
+    def add_chunk(self, chunk, top_points, bottom_points):
+        # The point lists include the last point of the previous chunk so
+        # the strips join up without gaps. A wall with a single point has no
+        # segment in this chunk (level files can have long segments).
+        walls = [(points, edge) for points, edge in ((top_points, 0), (bottom_points, self.height))
+                 if len(points) > 1]
+        if not walls:
+            return
+        pad = self.line_width
+        left = int(min(x for points, edge in walls for x, y in points)) - pad
+        right = max(x for points, edge in walls for x, y in points) + pad
+        image = pygame.Surface((int(right - left) + 1, self.height), pygame.SRCALPHA)
+
+        for points, edge in walls:
+            shifted = [(x - left, y) for x, y in points]
+
+            # Fill the area above the top wall or below the bottom wall
+            pygame.draw.polygon(image, self.color, [(shifted[0][0], edge)] + shifted + [(shifted[-1][0], edge)])
+            pygame.draw.lines(image, self.color, False, shifted, self.line_width)
+
+        self.strips[chunk.index] = (left, prepare(image))
+
+    def remove_chunk(self, chunk):
+        self.strips.pop(chunk.index, None)
+
+    def sprites(self, camera_x, screen_width):
+        # blits() entries for the strips that are on screen
+        entries = []
+        for left, image in self.strips.values():
+            x = left - camera_x
+            if x < screen_width and x + image.get_width() > 0:
+                entries.append((image, (x, 0)))
+        return entries
+
+class TextLabel:
+    # One line of HUD text. font.render is slow, so the text is only
+    # rendered again when it actually changed.
+    def __init__(self, font, color):
+        self.font = font
+        self.color = color
+        self.text = None
+        self.image = None
+
+    def render(self, text):
+        if text != self.text:
+            self.text = text
+            self.image = self.font.render(text, True, self.color)
+        return self.image
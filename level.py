@@ -0,0 +1,246 @@
+import random
+import threading
+from collections import deque
+from geometry import Segments
+from reachability import Reachability
+from spatial import SpatialIndex
+from sprites import Spike
+
+class Chunk:
+    # One wall_segment_width wide slice of the level and everything in it
+    def __init__(self, index, x_start, x_end):
+        self.index = index
+        self.x_start = x_start
+        self.x_end = x_end
+        self.segment_end = 0  # Id after the chunk's last wall segment
+        self.spikes = []
+        self.top_point_count = 0  # Points added to each of the wall point lists
+        self.bottom_point_count = 0
+
+class Level:
+    # The walls and spikes of one run. Chunks of wall_segment_width are
+    # generated just ahead of the camera by update() and dropped again once
+    # the camera has passed them, so a run never ends and memory stays flat.
+    def __init__(self, screen_width, screen_height, seed=None, wall_segments=None,
+                 spikes_per_segment=0.5, terrain=None, source=None, check_reachable=True):
+        self.screen_width = screen_width
+        self.screen_height = screen_height
+        self.seed = seed
+        self.random = random.Random(seed)
+        self.wall_segments = wall_segments  # Level length in chunks, None streams forever
+        self.wall_segment_width = 200
+        self.spikes_per_segment = spikes_per_segment
+        self.spike_free_distance = 500  # No spikes right at the start
+        self.terrain = terrain  # Optional TerrainLayer that gets a strip per chunk
+        self.source = source  # Optional LevelFile to read chunks from instead of generating them
+        if source is not None:
+            self.wall_segments = source.chunk_count(self.wall_segment_width)
+
+        # Generated chunks the player cannot get through are re-rolled (up to
+        # max_rerolls times) before they are added, level files are played as they are
+        self.reachability = Reachability(screen_height) if check_reachable and source is None else None
+        self.max_rerolls = 5
+
+        self.segments = Segments()
+        self.top_wall_points = []
+        self.bottom_wall_points = []
+
+        # Sorted by x so collisions and drawing only look at nearby objects
+        self.flat_wall_index = SpatialIndex()
+        self.angled_wall_index = SpatialIndex()
+        self.spike_index = SpatialIndex()
+
+        self.chunks = deque()
+        self.next_chunk = 0
+        self.update(0)
+
+    def update(self, camera_x):
+        # Generate chunks until the walls reach past the visible screen. Walls
+        # from a level file can have segments spanning several chunks, so
+        # this goes by the last wall point and not by the chunk count.
+        generate_until = camera_x + self.screen_width + self.wall_segment_width
+        while self.walls_until() < generate_until:
+            if self.wall_segments is not None and self.next_chunk >= self.wall_segments:
+                break
+            self.chunks.append(self.generate_chunk(self.next_chunk))
+            self.next_chunk += 1
+
+        # Drop chunks that are completely behind the camera
+        while self.chunks and self.chunks[0].x_end < camera_x:
+            self.remove_chunk(self.chunks.popleft())
+
+    def walls_until(self):
+        # x up to which both walls exist
+        if not self.top_wall_points or not self.bottom_wall_points:
+            return self.next_chunk * self.wall_segment_width
+        return min(self.top_wall_points[-1][0], self.bottom_wall_points[-1][0])
+
+    def generate_chunk(self, index):
+        x = index * self.wall_segment_width
+        chunk = Chunk(index, x, x + self.wall_segment_width)
+
+        if self.source is None:
+            top_points, bottom_points, spikes = self.generate_geometry(chunk)
+            if self.reachability is not None:
+                top_points, bottom_points, spikes = self.reachable_geometry(chunk, top_points, bottom_points, spikes)
+            top_flags = bottom_flags = None
+        else:
+            top_points, top_flags, bottom_points, bottom_flags, spikes = self.source.chunk(chunk.x_start, chunk.x_end)
+
+        # Walls are joined to the last point of the previous chunk, so every
+        # segment belongs to the chunk its right end is in
+        top_line = self.top_wall_points[-1:] + top_points
+        self.create_wall_segments(top_line, "top", top_flags)
+        self.top_wall_points.extend(top_points)
+        bottom_line = self.bottom_wall_points[-1:] + bottom_points
+        self.create_wall_segments(bottom_line, "bottom", bottom_flags)
+        self.bottom_wall_points.extend(bottom_points)
+        chunk.top_point_count = len(top_points)
+        chunk.bottom_point_count = len(bottom_points)
+        chunk.segment_end = self.segments.end
+
+        for spike_x, spike_y, size in spikes:
+            spike = Spike(spike_x, spike_y, size)
+            self.spike_index.add(spike_x - size, spike_x + size, spike)
+            chunk.spikes.append(spike)
+
+        if self.terrain is not None:
+            self.terrain.add_chunk(chunk, top_line, bottom_line)
+        return chunk
+
+    def generate_geometry(self, chunk):
+        # Top wall
+        top_y_start = self.random.randint(100, 200)
+        top_points = self.generate_zigzag(chunk.x_start, top_y_start, self.wall_segment_width, 50, "top")
+
+        # Bottom wall
+        bottom_y_start = self.random.randint(self.screen_height - 200, self.screen_height - 100)
+        bottom_points = self.generate_zigzag(chunk.x_start, bottom_y_start, self.wall_segment_width, 50, "bottom")
+
+        spikes = self.generate_spikes(chunk.x_start, chunk.x_end)
+        return top_points, bottom_points, spikes
+
+    def reachable_geometry(self, chunk, top_points, bottom_points, spikes):
+        # Re-roll the chunk while no player state gets through it, and take
+        # out the spikes of the last roll if none did. Re-rolls draw from the
+        # level's RNG, so a seed still always gives the same level.
+        reachability = self.reachability
+        for attempt in range(self.max_rerolls + 1):
+            if attempt:
+                reachability.rerolls += 1
+                top_points, bottom_points, spikes = self.generate_geometry(chunk)
+            states = reachability.explore(self, chunk.x_end, self.chunk_walls(top_points, bottom_points), spikes)
+            if states is not None:
+                reachability.accept(states)
+                return top_points, bottom_points, spikes
+
+        states = reachability.explore(self, chunk.x_end, self.chunk_walls(top_points, bottom_points), [])
+        if states is not None:
+            reachability.cleared += 1
+            reachability.accept(states)
+        else:
+            reachability.failures += 1  # Walls of earlier chunks closed the way
+            reachability.give_up(chunk.x_end)
+        return top_points, bottom_points, []
+
+    def chunk_walls(self, top_points, bottom_points):
+        # Segments the new wall points would add, joined to the walls so far
+        return (list(self.wall_lines(self.top_wall_points[-1:] + top_points, "top")) +
+                list(self.wall_lines(self.bottom_wall_points[-1:] + bottom_points, "bottom")))
+
+    def remove_chunk(self, chunk):
+        # Drop the chunk's segments (ids below its segment_end) and spikes
+        self.segments.remove_before(chunk.segment_end)
+        self.flat_wall_index.remove_if(lambda segment: segment < chunk.segment_end)
+        self.angled_wall_index.remove_if(lambda segment: segment < chunk.segment_end)
+        spikes = set(chunk.spikes)
+        self.spike_index.remove_if(lambda spike: spike in spikes)
+        del self.top_wall_points[:chunk.top_point_count]
+        del self.bottom_wall_points[:chunk.bottom_point_count]
+        if self.terrain is not None:
+            self.terrain.remove_chunk(chunk)
+
+    def wall_lines(self, points, wall_type, flags=None):
+        # (x1, y1, x2, y2, is_flat, is_top) for every segment of a wall line.
+        # flags optionally gives the flat flag of each segment (level files store them).
+        for i in range(len(points) - 1):
+            x1, y1 = points[i]
+            x2, y2 = points[i + 1]
+
+            # Check if this is a horizontal segment (flat)
+            is_flat = abs(y2 - y1) < 5 if flags is None else flags[i]
+            yield x1, y1, x2, y2, is_flat, wall_type == "top"
+
+    def create_wall_segments(self, points, wall_type, flags=None):
+        for x1, y1, x2, y2, is_flat, is_top in self.wall_lines(points, wall_type, flags):
+            # Store the segment and index it by kind, angled walls are obstacles
+            segment_id = self.segments.add(x1, y1, x2, y2, is_flat, is_top)
+            if is_flat:
+                self.flat_wall_index.add(min(x1, x2), max(x1, x2), segment_id)
+            else:
+                self.angled_wall_index.add(min(x1, x2), max(x1, x2), segment_id)
+
+    def generate_zigzag(self, start_x, start_y, width, height, wall_type):
+        points = []
+        segments = 4
+        segment_width = width / segments
+
+        for i in range(segments + 1):
+            x = start_x + i * segment_width
+
+            # Alternate high and low points
+            if i % 2 == 0:
+                y = start_y
+            else:
+                if wall_type == "top":
+                    y = start_y + height
+                else:
+                    y = start_y - height
+
+            points.append((x, y))
+
+        return points
+
+    def generate_spikes(self, x_start, x_end):
+        # Pick (x, y, size) for the spike obstacles between the walls of one
+        # chunk. Spikes stay fully inside their chunk so they never pop out
+        # of view when the chunk is dropped.
+        spikes = []
+        size = 30
+        x_min = max(x_start + size, self.spike_free_distance)
+        x_max = x_end - size
+        if x_min > x_max:
+            return spikes
+
+        # spikes_per_segment can be fractional, e.g. 0.5 is one spike every other chunk
+        count = int(self.spikes_per_segment)
+        if self.random.random() < self.spikes_per_segment - count:
+            count += 1
+
+        for i in range(count):
+            x = self.random.randint(x_min, x_max)
+
+            # Find safe y range between walls
+            top_y = 200  # Minimum safe distance from top
+            bottom_y = self.screen_height - 200  # Minimum safe distance from bottom
+
+            if bottom_y - top_y > 80:  # Make sure there's enough room
+                y = self.random.randint(top_y, bottom_y)
+                spikes.append((x, y, size))
+        return spikes
+
+class LevelBuilder:
+    # Builds a level on a worker thread while the current run is played,
+    # so switching to it at restart does not stall a frame
+    def __init__(self, *args, **kwargs):
+        self.level = None
+        self.thread = threading.Thread(target=self.build, args=args, kwargs=kwargs, daemon=True)
+        self.thread.start()
+
+    def build(self, *args, **kwargs):
+        self.level = Level(*args, **kwargs)
+
+    def result(self):
+        # Waits for the level (normally long finished by the time it is needed)
+        self.thread.join()
+        return self.level
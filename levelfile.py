@@ -0,0 +1,147 @@
+import argparse
+import hashlib
+import mmap
+import struct
+import numpy as np
+
+# Compiled levels. A level file is a small header followed by packed
+# little-endian arrays:
+#
+#   header      magic "ZZLV", format version, number of top points,
+#               bottom points and spikes, level width (64 bytes in total)
+#   top wall    x[top], y[top]                     float64
+#   bottom wall x[bottom], y[bottom]               float64
+#   spikes      x[spikes], y[spikes], size[spikes] float64, sorted by x
+#   flat flags  top[top - 1], bottom[bottom - 1]   uint8, one per segment
+#
+# Every array starts on an 8 byte boundary. Files are opened with mmap and
+# the arrays are NumPy views into the mapping, so opening a huge level only
+# reads the header and a chunk only touches the pages it needs.
+
+MAGIC = b"ZZLV"
+VERSION = 1
+HEADER = struct.Struct("<4sIQQQd")
+HEADER_SIZE = 64
+
+class LevelFileError(Exception):
+    pass
+
+def padded(size):
+    return (size + 7) // 8 * 8
+
+def write_level(path, top_points, bottom_points, spikes, top_flags=None, bottom_flags=None):
+    # Write walls given as lists of (x, y) and spikes as (x, y, size).
+    # Flat flags default to the same rule the game uses for generated walls.
+    top = np.asarray(top_points, dtype="<f8").reshape(-1, 2)
+    bottom = np.asarray(bottom_points, dtype="<f8").reshape(-1, 2)
+    spikes = np.asarray(sorted(spikes), dtype="<f8").reshape(-1, 3)
+    for name, wall in (("top", top), ("bottom", bottom)):
+        if len(wall) < 2:
+            raise LevelFileError(f"the {name} wall needs at least two points")
+        if np.any(np.diff(wall[:, 0]) < 0):
+            raise LevelFileError(f"the {name} wall must go from left to right")
+    if top_flags is None:
+        top_flags = np.abs(np.diff(top[:, 1])) < 5
+    if bottom_flags is None:
+        bottom_flags = np.abs(np.diff(bottom[:, 1])) < 5
+    width = float(max(top[-1, 0], bottom[-1, 0]))
+
+    with open(path, "wb") as f:
+        f.write(HEADER.pack(MAGIC, VERSION, len(top), len(bottom), len(spikes), width).ljust(HEADER_SIZE, b"\0"))
+        arrays = [top[:, 0], top[:, 1], bottom[:, 0], bottom[:, 1], spikes[:, 0], spikes[:, 1], spikes[:, 2],
+                  np.asarray(top_flags, dtype=np.uint8), np.asarray(bottom_flags, dtype=np.uint8)]
+        for array in arrays:
+            data = np.ascontiguousarray(array).tobytes()
+            f.write(data.ljust(padded(len(data)), b"\0"))
+
+class LevelFile:
+    # A compiled level opened with mmap, usable as a Level source
+    def __init__(self, path):
+        self.path = path
+        self.hash = None
+        with open(path, "rb") as f:
+            self.map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        if len(self.map) < HEADER_SIZE:
+            raise LevelFileError(f"{path} is not a level file")
+        magic, version, top, bottom, spikes, self.width = HEADER.unpack_from(self.map, 0)
+        if magic != MAGIC:
+            raise LevelFileError(f"{path} is not a level file")
+        if version != VERSION:
+            raise LevelFileError(f"{path} has level format version {version}, expected {VERSION}")
+
+        offset = HEADER_SIZE
+        def view(dtype, count):
+            nonlocal offset
+            array = np.frombuffer(self.map, dtype=dtype, count=count, offset=offset)
+            offset += padded(array.nbytes)
+            return array
+
+        try:
+            self.top_x, self.top_y = view("<f8", top), view("<f8", top)
+            self.bottom_x, self.bottom_y = view("<f8", bottom), view("<f8", bottom)
+            self.spike_x, self.spike_y, self.spike_size = view("<f8", spikes), view("<f8", spikes), view("<f8", spikes)
+            self.top_flat, self.bottom_flat = view(np.uint8, top - 1), view(np.uint8, bottom - 1)
+        except ValueError:
+            raise LevelFileError(f"{path} is truncated")
+
+    def content_hash(self):
+        # SHA-256 of the file, replays use it to make sure they are played on the same level
+        if self.hash is None:
+            self.hash = hashlib.sha256(self.map).hexdigest()
+        return self.hash
+
+    def chunk_count(self, chunk_width):
+        return int(self.width // chunk_width) + 1
+
+    def wall_chunk(self, xs, ys, flags, x_start, x_end):
+        # Points with x in [x_start, x_end) and the flat flag of the segment
+        # ending at each of them (the first point of the wall has none)
+        lo, hi = np.searchsorted(xs, [x_start, x_end])
+        points = list(zip(xs[lo:hi].tolist(), ys[lo:hi].tolist()))
+        segment_flags = [bool(flag) for flag in flags[max(lo - 1, 0):max(hi - 1, 0)]]
+        return points, segment_flags
+
+    def chunk(self, x_start, x_end):
+        # Everything Level needs for one chunk
+        top_points, top_flags = self.wall_chunk(self.top_x, self.top_y, self.top_flat, x_start, x_end)
+        bottom_points, bottom_flags = self.wall_chunk(self.bottom_x, self.bottom_y, self.bottom_flat,
+                                                      x_start, x_end)
+        lo, hi = np.searchsorted(self.spike_x, [x_start, x_end])
+        spikes = list(zip(self.spike_x[lo:hi].tolist(), self.spike_y[lo:hi].tolist(),
+                          self.spike_size[lo:hi].tolist()))
+        return top_points, top_flags, bottom_points, bottom_flags, spikes
+
+    def close(self):
+        # Drop the views before the mapping they point into
+        for name in ("top_x", "top_y", "bottom_x", "bottom_y", "spike_x", "spike_y", "spike_size",
+                     "top_flat", "bottom_flat"):
+            setattr(self, name, None)
+        self.map.close()
+
+def export_generated(path, seed, wall_segments, screen_width=800, screen_height=600, spikes_per_segment=0.5):
+    # Compile a randomly generated level, e.g. to share a good seed
+    from level import Level
+    level = Level(screen_width, screen_height, seed, wall_segments, spikes_per_segment)
+    spikes = [(s.x, s.y, s.size) for chunk in level.chunks for s in chunk.spikes]
+    while level.next_chunk < wall_segments:
+        chunk = level.generate_chunk(level.next_chunk)
+        spikes += [(s.x, s.y, s.size) for s in chunk.spikes]
+        level.next_chunk += 1
+    write_level(path, level.top_wall_points, level.bottom_wall_points, spikes)
+
+def main():
+    parser = argparse.ArgumentParser(description="Compile levels to the binary level format")
+    parser.add_argument("source", help="Tiled map (.tmx or .json), or 'random' for a generated level")
+    parser.add_argument("output", nargs="?", help="level file to write (Tiled maps default to the cache)")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--segments", type=int, default=100)
+    args = parser.parse_args()
+
+    if args.source == "random":
+        export_generated(args.output or "level.zzl", args.seed, args.segments)
+    else:
+        from tiled import compile_map
+        print(compile_map(args.source, output=args.output))
+
+if __name__ == "__main__":
+    main()
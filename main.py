@@ -1,45 +1,168 @@
+import time
+start_time = time.perf_counter()  # For the time to first frame
+
+import math
 import pygame
 import sys
 from game import Game
+from profiler import FrameProfiler
+from render import create_backend
+from audio import Audio
+
+# The game logic always runs at 60 updates per second, independent of how
+# often the screen is drawn. Real time is collected in an accumulator and
+# spent in whole updates; what is left over says how far to interpolate
+# between the last two updates when drawing.
+UPDATES_PER_SECOND = 60
+UPDATE_TIME = 1 / UPDATES_PER_SECOND
+MAX_FRAME_TIME = 0.25  # After longer stalls (window dragged, debugger) the game slows down instead of jumping
 
 def main():
-    # Initialize pygame
-    pygame.init()
+    # Initialize only the parts of pygame the game uses, pygame.init() would
+    # also start joysticks and the rest
+    pygame.display.init()
+    pygame.font.init()
+    
+    # Sound effects (--mute turns them off), loaded once before the game starts
+    audio = Audio(enabled="--mute" not in sys.argv)
     
-    # Set up the display
+    # Set up the display, --render textures draws with SDL's renderer instead of software blits
     screen_width, screen_height = 800, 600
-    screen = pygame.display.set_mode((screen_width, screen_height))
-    pygame.display.set_caption("Zigzag Arrow Game")
+    backend = sys.argv[sys.argv.index("--render") + 1] if "--render" in sys.argv else "software"
+    screen = create_backend(backend, (screen_width, screen_height), "Zigzag Arrow Game")
+    
+    # Frame profiler: F3 shows timings, F4 saves them to profile.csv/profile.json
+    profiler = FrameProfiler(enabled="--profile" in sys.argv)
+    profiler.visible = profiler.enabled
+    
+    # Frames drawn per second with --fps <n>, 0 draws as fast as possible
+    render_fps = int(sys.argv[sys.argv.index("--fps") + 1]) if "--fps" in sys.argv else 60
+    
+    # Runs are appended to a replay file with --record <file>
+    replay_path = None
+    if "--record" in sys.argv:
+        import replay
+        replay_path = sys.argv[sys.argv.index("--record") + 1]
     
-    # Create game instance
-    game = Game(screen_width, screen_height)
+    # --level <file> plays a compiled level or a Tiled map (.tmx/.json, compiled on first use)
+    level_source = None
+    if "--level" in sys.argv:
+        from levelfile import LevelFile
+        from tiled import level_file_path
+        level_source = LevelFile(level_file_path(sys.argv[sys.argv.index("--level") + 1]))
+    
+    # Create game instance, its first level is built while the first frame is shown
+    game = Game(screen_width, screen_height, profiler=profiler, level_source=level_source, defer_level=True,
+                audio=audio)
+    
+    # Show the first frame before the loop, the first update waits for the level
+    screen.present(game.draw(screen))
+    if profiler.enabled:
+        print(f"First frame after {(time.perf_counter() - start_time) * 1000:.0f} ms")
     
     # Game loop
-    clock = pygame.time.Clock()
+    pygame.event.set_blocked(pygame.MOUSEMOTION)  # Unused, and it would wake the loop all the time
+    frame_time = 1 / render_fps if render_fps else 0.0
+    next_frame = time.perf_counter()
+    accumulator = 0.0
+    last_time = time.perf_counter()
+    shown_input = []  # Times of input that reached the game but is not on screen yet
     while True:
-        for event in pygame.event.get():
-            if event.type == pygame.QUIT:
-                pygame.quit()
-                sys.exit()
-            elif event.type == pygame.MOUSEBUTTONDOWN:
-                game.handle_mouse_down()
-            elif event.type == pygame.MOUSEBUTTONUP:
-                game.handle_mouse_up()
-            elif event.type == pygame.KEYDOWN:
-                if event.key == pygame.K_SPACE:
-                    if game.game_over:
-                        game.reset()
+        # Wait for the next frame. Input wakes the loop right away and a frame
+        # showing it is drawn at once. pygame events carry no time of their
+        # own, input is stamped when it is read, within a millisecond of it happening.
+        events = wait_for_events(next_frame)
+        now = time.perf_counter()
+        if now >= next_frame:
+            next_frame = max(next_frame + frame_time, now)
+        
+        mouse_input = []
+        with profiler.section("events"):
+            for event in events:
+                if event.type == pygame.QUIT:
+                    if profiler.enabled:
+                        print_latency(profiler)
+                    pygame.quit()
+                    sys.exit()
+                elif event.type == pygame.WINDOWEXPOSED:
+                    game.invalidate()
+                elif event.type in (pygame.MOUSEBUTTONDOWN, pygame.MOUSEBUTTONUP):
+                    mouse_input.append(event)
+                elif event.type == pygame.KEYDOWN:
+                    if event.key == pygame.K_SPACE:
+                        if game.game_over:
+                            # Clicks queued before the restart went to the game-over
+                            # screen, which ignores them, not to the new run
+                            mouse_input.clear()
+                            game.reset()
+                    elif event.key == pygame.K_F3:
+                        profiler.toggle()
+                        game.invalidate()  # Clears away the overlay on the game-over screen
+                    elif event.key == pygame.K_F4:
+                        profiler.export_csv("profile.csv")
+                        profiler.export_json("profile.json")
         
-        # Update game
-        game.update()
+        # Update game, as many fixed steps as real time has passed. Those
+        # steps are the time before the input was read, so input goes in
+        # after them and the frame drawn below already shows it.
+        accumulator += min(now - last_time, MAX_FRAME_TIME)
+        last_time = now
+        with profiler.section("update"):
+            while accumulator >= UPDATE_TIME:
+                was_over = game.game_over
+                game.update()
+                if replay_path and game.game_over and not was_over:
+                    replay.save(replay_path, replay.record(game))
+                accumulator -= UPDATE_TIME
+            for event in mouse_input:
+                if apply_input(game, event):
+                    shown_input.append(now)
         
-        # Draw everything
-        screen.fill((0, 0, 0))
-        game.draw(screen)
-        pygame.display.flip()
+        # Draw everything. The background covers the whole screen, so there
+        # is no need to clear it first. Only changed areas go to the display,
+        # while the game-over screen is up that is nothing at all.
+        with profiler.section("draw"):
+            if profiler.visible:
+                game.invalidate()  # The overlay is drawn on top of the game every frame
+            dirty = game.draw(screen, accumulator / UPDATE_TIME)
+            profiler.draw(screen)
+        with profiler.section("flip"):
+            screen.present(dirty)
         
-        # Cap the frame rate
-        clock.tick(60)
+        # Input to display latency, for the input this frame is the first to show
+        if shown_input:
+            presented = time.perf_counter()
+            for input_time in shown_input:
+                profiler.record("input latency", presented - input_time)
+            shown_input.clear()
+
+def wait_for_events(deadline):
+    # Events until deadline (a perf_counter time), returning as soon as there are any
+    events = pygame.event.get()
+    while not events:
+        timeout = deadline - time.perf_counter()
+        if timeout <= 0:
+            break
+        event = pygame.event.wait(max(1, math.ceil(timeout * 1000)))
+        if event.type != pygame.NOEVENT:
+            events = [event] + pygame.event.get()
+    return events
+
+def apply_input(game, event):
+    # Returns False for clicks on the game-over screen, which do nothing
+    if game.game_over:
+        return False
+    if event.type == pygame.MOUSEBUTTONDOWN:
+        game.handle_mouse_down()
+    else:
+        game.handle_mouse_up()
+    return True
+
+def print_latency(profiler):
+    for row in profiler.summary():
+        if row["section"] == "input latency":
+            print(f"Input latency over {row['samples']} inputs: p50 {row['p50_ms']:.1f} ms, "
+                  f"p95 {row['p95_ms']:.1f} ms, p99 {row['p99_ms']:.1f} ms")
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
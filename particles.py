@@ -0,0 +1,113 @@
+import math
+import numpy as np
+import pygame
+
+# Particle effects. Particles live in preallocated NumPy columns; a stack of
+# free slots hands them out and takes them back, so emitting, moving and
+# drawing thousands of particles creates no Python objects per particle.
+# Particles are drawn as small squares straight into the pixels of a
+# transparent layer, and only the part of the layer they cover is blitted.
+
+class ParticlePool:
+    def __init__(self, screen_width, screen_height, capacity=4096, size=2, gravity=0.15, seed=None):
+        self.capacity = capacity
+        self.size = size  # Particles are size x size pixel squares
+        self.gravity = gravity
+        self.random = np.random.default_rng(seed)  # Only for looks, the game's RNG is left alone
+
+        self.x = np.zeros(capacity)  # Level coordinates
+        self.y = np.zeros(capacity)
+        self.vx = np.zeros(capacity)
+        self.vy = np.zeros(capacity)
+        self.age = np.zeros(capacity)
+        self.lifetime = np.ones(capacity)
+        self.color = np.zeros((capacity, 3))
+        self.alive = np.zeros(capacity, dtype=bool)
+
+        # Free slots are free[:free_count]
+        self.free = np.arange(capacity - 1, -1, -1, dtype=np.int32)
+        self.free_count = capacity
+
+        self.layer = pygame.Surface((screen_width, screen_height), pygame.SRCALPHA)
+        self.drawn = None  # Area of the layer drawn last frame, cleared before the next
+
+    def __len__(self):
+        return self.capacity - self.free_count
+
+    def emit(self, count, x, y, color, speed=3.0, lifetime=40, direction=0.0, spread=2 * math.pi):
+        # A burst of particles from (x, y) flying at up to speed pixels per
+        # frame, in directions within spread radians around direction.
+        # Emits fewer particles when the pool is full.
+        count = min(count, self.free_count)
+        if count == 0:
+            return
+        slots = self.free[self.free_count - count:self.free_count]
+        self.free_count -= count
+
+        angle = direction + (self.random.random(count) - 0.5) * spread
+        velocity = speed * (0.3 + 0.7 * self.random.random(count))
+        self.x[slots] = x
+        self.y[slots] = y
+        self.vx[slots] = np.cos(angle) * velocity
+        self.vy[slots] = np.sin(angle) * velocity
+        self.age[slots] = 0
+        self.lifetime[slots] = lifetime * (0.5 + 0.5 * self.random.random(count))
+        self.color[slots] = color
+        self.alive[slots] = True
+
+    def update(self):
+        # One game frame for every particle, dead ones go back on the free stack
+        if self.free_count == self.capacity:
+            return
+        alive = self.alive
+        self.x += self.vx
+        self.y += self.vy
+        self.vy += self.gravity
+        self.age += 1
+        dead = np.flatnonzero(alive & (self.age >= self.lifetime))
+        if len(dead):
+            alive[dead] = False
+            self.free[self.free_count:self.free_count + len(dead)] = dead
+            self.free_count += len(dead)
+
+    def clear(self):
+        self.alive[:] = False
+        self.free[:] = np.arange(self.capacity - 1, -1, -1, dtype=np.int32)
+        self.free_count = self.capacity
+
+    def sprites(self, camera_x):
+        # blits() entries for the particles on screen (at most one entry)
+        pixels = pygame.surfarray.pixels2d(self.layer)
+        if self.drawn is not None:
+            left, top, right, bottom = self.drawn
+            pixels[left:right, top:bottom] = 0
+            self.drawn = None
+        if self.free_count == self.capacity:
+            return []
+
+        # Cull against the screen
+        width, height = pixels.shape
+        screen_x = (self.x - camera_x).astype(np.int32)
+        screen_y = self.y.astype(np.int32)
+        visible = np.flatnonzero(self.alive & (screen_x >= 0) & (screen_x < width - self.size)
+                                 & (screen_y >= 0) & (screen_y < height - self.size))
+        if len(visible) == 0:
+            return []
+        screen_x = screen_x[visible]
+        screen_y = screen_y[visible]
+
+        # Fade out over the lifetime, colors are packed for the layer's pixel format
+        alpha = 255 * np.clip(1 - self.age[visible] / self.lifetime[visible], 0, 1)
+        color = self.color[visible]
+        shifts = self.layer.get_shifts()
+        packed = ((color[:, 0].astype(np.uint32) << shifts[0]) | (color[:, 1].astype(np.uint32) << shifts[1])
+                  | (color[:, 2].astype(np.uint32) << shifts[2]) | (alpha.astype(np.uint32) << shifts[3]))
+        for dx in range(self.size):
+            for dy in range(self.size):
+                pixels[screen_x + dx, screen_y + dy] = packed.view(pixels.dtype)
+
+        left, top = int(screen_x.min()), int(screen_y.min())
+        right, bottom = int(screen_x.max()) + self.size, int(screen_y.max()) + self.size
+        self.drawn = (left, top, right, bottom)
+        area = pygame.Rect(left, top, right - left, bottom - top)
+        return [(self.layer, area.topleft, area)]
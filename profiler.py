@@ -0,0 +1,124 @@
+import csv
+import json
+import time
+import pygame
+from collections import deque
+
+# Optional timing of the phases of a frame. Code wraps its hot paths in
+# "with profiler.section(name):" blocks. While the profiler is off that is
+# a shared do-nothing context manager, so it can stay in release builds.
+
+class NullSection:
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+NULL_SECTION = NullSection()
+
+class Section:
+    # Times one named phase, reused every frame so timing allocates nothing
+    def __init__(self, samples):
+        self.samples = samples
+        self.start = 0.0
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.samples.append(time.perf_counter() - self.start)
+        return False
+
+def percentile(sorted_values, p):
+    # Nearest-rank percentile of an already sorted list
+    if not sorted_values:
+        return 0.0
+    rank = max(0, min(len(sorted_values) - 1, round(p / 100 * len(sorted_values)) - 1))
+    return sorted_values[rank]
+
+class FrameProfiler:
+    def __init__(self, enabled=False, window=600):
+        self.enabled = enabled
+        self.visible = False  # Overlay on screen
+        self.window = window  # Number of recent samples kept per section
+        self.samples = {}  # name -> deque of durations in seconds, in first-seen order
+        self.sections = {}
+        self.font = None
+        self.overlay = None
+        self.overlay_age = 0
+
+    def section(self, name):
+        if not self.enabled:
+            return NULL_SECTION
+        section = self.sections.get(name)
+        if section is None:
+            self.samples[name] = deque(maxlen=self.window)
+            section = self.sections[name] = Section(self.samples[name])
+        return section
+
+    def record(self, name, seconds):
+        # A duration measured elsewhere (e.g. input latency, which spans
+        # frames), summarized like the sections
+        if self.enabled:
+            self.section(name).samples.append(seconds)
+
+    def toggle(self):
+        # Turn profiling and the overlay on or off together
+        self.enabled = not self.enabled
+        self.visible = self.enabled
+        self.overlay = None
+
+    def summary(self):
+        # One row per section: name, samples, mean, p50, p95 and p99 in milliseconds
+        rows = []
+        for name, samples in self.samples.items():
+            values = sorted(samples)
+            mean = sum(values) / len(values) if values else 0.0
+            rows.append({
+                "section": name,
+                "samples": len(values),
+                "mean_ms": mean * 1000,
+                "p50_ms": percentile(values, 50) * 1000,
+                "p95_ms": percentile(values, 95) * 1000,
+                "p99_ms": percentile(values, 99) * 1000,
+            })
+        return rows
+
+    def export_csv(self, path):
+        rows = self.summary()
+        with open(path, "w", newline="") as f:
+            writer = csv.DictWriter(f, fieldnames=["section", "samples", "mean_ms", "p50_ms", "p95_ms", "p99_ms"])
+            writer.writeheader()
+            writer.writerows(rows)
+
+    def export_json(self, path):
+        with open(path, "w") as f:
+            json.dump(self.summary(), f, indent=2)
+
+    def draw(self, screen):
+        if not self.visible:
+            return
+
+        # Percentiles only change slowly, so the overlay is rebuilt twice a second
+        self.overlay_age -= 1
+        if self.overlay is None or self.overlay_age <= 0:
+            self.overlay = self.render_overlay()
+            self.overlay_age = 30
+        screen.blit(self.overlay, (10, 60))
+
+    def render_overlay(self):
+        if self.font is None:
+            self.font = pygame.font.Font(None, 20)
+        lines = ["section             p50     p95     p99  (ms)"]
+        for row in self.summary():
+            lines.append(f"{row['section']:<16} {row['p50_ms']:7.3f} {row['p95_ms']:7.3f} {row['p99_ms']:7.3f}")
+
+        line_height = self.font.get_linesize()
+        width = max(self.font.size(line)[0] for line in lines) + 10
+        overlay = pygame.Surface((width, line_height * len(lines) + 10), pygame.SRCALPHA)
+        overlay.fill((0, 0, 0, 170))
+        for i, line in enumerate(lines):
+            overlay.blit(self.font.render(line, True, (255, 255, 255)), (5, 5 + i * line_height))
+        return overlay
@@ -0,0 +1,187 @@
+import math
+import numpy as np
+
+# Checks that generated levels can be played through. The player's state
+# in a frame is its rect.y plus the wall it hit last, and each frame the
+# rules of Game.update leave only a few ways to go on:
+#
+#   last hit bottom  up or down (mouse down or up)
+#   last hit top     down, whatever the mouse does
+#
+# The states reached in a frame are kept as two bitsets (bit y set: the
+# player can be at rect.y == y), one per last wall. Every state is visited
+# once per frame however many input sequences lead to it, and states that
+# hit a spike or an angled wall are dropped right away, so a chunk costs a
+# handful of integer operations per frame plus one NumPy pass over its
+# obstacles. Collisions use the same tests as Game: the player is a circle
+# of radius player.size around rect.center, flat walls bounce it.
+#
+# Level calls explore() for every chunk before adding it and re-rolls the
+# chunk when no state gets through.
+
+class Reachability:
+    def __init__(self, screen_height, player_x=100, radius=10, width=30, height=20, speed=3, step=2,
+                 floor=600):
+        # Defaults are those of Game and Player (step is the whole pixels the
+        # rect moves at +-60 degrees, floor the screen bound in Player.update)
+        self.player_x = player_x  # rect.centerx, the player's level x is this plus camera_x
+        self.radius = radius
+        self.height = height
+        self.speed = speed
+        self.step = step
+        self.lowest = floor - height  # Largest rect.y
+        self.full = (1 << (self.lowest + 1)) - 1
+        self.ys = np.arange(self.lowest + 1)
+
+        # Obstacles of a chunk reach this far to the left of it (the player's
+        # radius, spikes stay further inside their chunk), so a chunk decides
+        # the frames up to that far before its end
+        self.margin = radius
+
+        # The player starts pointing straight right and only moves in the
+        # first frame when the mouse goes down, so after frame 1 it is at its
+        # start y or one step above it
+        start_y = screen_height // 2 - height // 2
+        self.frame = 1
+        self.free = (1 << start_y) | (1 << (start_y - step))  # Last hit bottom
+        self.falling = 0  # Last hit top
+
+        # Counters for the level's chunks
+        self.rerolls = 0
+        self.cleared = 0  # Chunks that only got through without their spikes
+        self.failures = 0  # Chunks that did not get through at all
+
+    def last_frame(self, x):
+        # Last frame in which the player's level x is before x
+        return math.ceil((x - self.player_x) / self.speed) - 1
+
+    def explore(self, level, x_end, walls, spikes):
+        # Follow the reachable states through the frames up to x_end - margin.
+        # walls ((x1, y1, x2, y2, is_flat, is_top) tuples) and spikes ((x, y,
+        # size) tuples) are a new chunk that is not in the level yet. Returns
+        # (frame, free, falling) for accept(), or None when no state survives.
+        last = self.last_frame(x_end - self.margin)
+        if last <= self.frame:
+            return self.frame, self.free, self.falling
+        px = self.player_x + self.speed * np.arange(self.frame + 1, last + 1)
+        x_min, x_max = px[0] - self.radius, px[-1] + self.radius
+
+        segments = level.segments
+        angled = [segments.line(segment) for segment in level.angled_wall_index.query(x_min, x_max)]
+        flat = [(*segments.line(segment), segments.is_top(segment))
+                for segment in level.flat_wall_index.query(px[0], px[-1])]
+        for x1, y1, x2, y2, is_flat, is_top in walls:
+            if is_flat:
+                flat.append((x1, y1, x2, y2, is_top))
+            else:
+                angled.append((x1, y1, x2, y2))
+        obstacles = [(spike.x, spike.y, spike.size * 0.7 + self.radius)
+                     for spike in level.spike_index.query(x_min, x_max)]
+        obstacles += [(x, y, size * 0.7 + self.radius) for x, y, size in spikes]
+        hits = self.hit_masks(px, obstacles, angled)
+        bounces = self.bounces(px, flat)
+
+        free, falling = self.free, self.falling
+        for i, hit in enumerate(hits):
+            free, falling = self.up(free) | self.down(free), self.down(falling)
+            for wall_y, is_top in bounces.get(i, ()):
+                free, falling = self.bounce(free, falling, wall_y, is_top)
+            free &= ~hit
+            falling &= ~hit
+            if not free and not falling:
+                return None
+        return last, free, falling
+
+    def accept(self, states):
+        self.frame, self.free, self.falling = states
+
+    def give_up(self, x_end):
+        # Nothing gets through, carry on from every position after the chunk
+        # so the chunks after it are still checked
+        self.frame = max(self.frame, self.last_frame(x_end - self.margin))
+        self.free = self.full
+        self.falling = 0
+
+    def up(self, states):
+        # Player.update stops the rect at the top of the screen
+        moved = states >> self.step
+        if states & ((1 << self.step) - 1):
+            moved |= 1
+        return moved
+
+    def down(self, states):
+        # ... and at the floor
+        moved = states << self.step
+        if moved > self.full:
+            moved = (moved & self.full) | (1 << self.lowest)
+        return moved
+
+    def bounce(self, free, falling, wall_y, is_top):
+        # handle_wall_collisions for one flat wall under the player
+        if is_top:
+            touching = (1 << max(0, math.floor(wall_y) + 1)) - 1  # rect.top <= wall_y
+            y = round_rect(wall_y + 1)
+        else:
+            touching = self.full & ~((1 << max(0, math.ceil(wall_y - self.height))) - 1)  # rect.bottom >= wall_y
+            y = round_rect(wall_y - 1) - self.height
+        if not (free | falling) & touching:
+            return free, falling
+        free &= ~touching
+        falling &= ~touching
+        if is_top:
+            falling |= 1 << y
+        else:
+            free |= 1 << y
+        return free, falling
+
+    def bounces(self, px, flat):
+        # frame index -> [(wall_y, is_top)] for the frames a flat wall is under the player
+        bounces = {}
+        for x1, y1, x2, y2, is_top in flat:
+            first, end = np.searchsorted(px, x1, side="left"), np.searchsorted(px, x2, side="right")
+            for i in range(first, end):
+                if abs(x2 - x1) < 0.001:
+                    wall_y = y1
+                else:
+                    wall_y = y1 + (px[i] - x1) / (x2 - x1) * (y2 - y1)
+                bounces.setdefault(i, []).append((wall_y, is_top))
+        return bounces
+
+    def hit_masks(self, px, spikes, walls):
+        # For every frame, the bitset of rect.y values at which the player
+        # hits a spike or an angled wall. Each obstacle is only tested in the
+        # frames and rows it can reach.
+        hit = np.zeros((len(px), len(self.ys)), dtype=bool)
+        for x, y, reach in spikes:
+            frames, rows = self.reach(px, x - reach, x + reach, y - reach, y + reach)
+            if frames is not None:
+                dx = x - px[frames, None]
+                dy = y - (self.ys[rows] + self.height // 2)
+                hit[frames, rows] |= np.sqrt(dx*dx + dy*dy) < reach
+        for x1, y1, x2, y2 in walls:
+            length_squared = (x2 - x1)**2 + (y2 - y1)**2
+            if length_squared == 0:
+                continue  # A point, line_circle_collision never hits those
+            frames, rows = self.reach(px, min(x1, x2) - self.radius, max(x1, x2) + self.radius,
+                                      min(y1, y2) - self.radius, max(y1, y2) + self.radius)
+            if frames is not None:
+                dx = px[frames, None] - x1
+                dy = self.ys[rows] + self.height // 2 - y1
+                t = np.clip((dx*(x2 - x1) + dy*(y2 - y1)) / length_squared, 0, 1)
+                hit[frames, rows] |= np.sqrt((dx - t*(x2 - x1))**2 + (dy - t*(y2 - y1))**2) <= self.radius
+        packed = np.packbits(hit, axis=1, bitorder="little")
+        return [int.from_bytes(row.tobytes(), "little") for row in packed]
+
+    def reach(self, px, x_min, x_max, y_min, y_max):
+        # Slices of the frames and rect.y rows in which the player's center is
+        # within [x_min, x_max] x [y_min, y_max], (None, None) if there are none
+        frames = slice(np.searchsorted(px, x_min, side="left"), np.searchsorted(px, x_max, side="right"))
+        center = self.height // 2
+        rows = slice(max(0, math.ceil(y_min) - center), max(0, min(len(self.ys), math.floor(y_max) - center + 1)))
+        if frames.start >= frames.stop or rows.start >= rows.stop:
+            return None, None
+        return frames, rows
+
+def round_rect(value):
+    # pygame.Rect rounds float coordinates half away from zero
+    return math.floor(value + 0.5) if value >= 0 else -math.floor(-value + 0.5)
@@ -0,0 +1,118 @@
+import weakref
+import pygame
+
+# Render backends. Everything in the game draws through the same small part
+# of the Surface API: blit(image, position), blits(entries), get_width(),
+# get_height() and get_rect(). A backend provides exactly that plus
+# refresh(image, area) for images whose pixels change after they were first
+# drawn and present(dirty_rects), so Game.draw does not care where its
+# pixels end up. Game.draw also takes a plain Surface (it only calls
+# refresh() when there is one).
+#
+#   SoftwareBackend  the display surface, every blit is done by the CPU
+#   TextureBackend   an SDL renderer; images are uploaded to textures the
+#                    first time they are drawn and drawn as textured quads
+#
+# The texture backend uses the GPU when SDL finds one and SDL's software
+# renderer otherwise (force it with SDL_RENDER_DRIVER=software).
+
+class SoftwareBackend:
+    def __init__(self, size, caption):
+        self.surface = pygame.display.set_mode(size)
+        pygame.display.set_caption(caption)
+
+    def blit(self, image, position):
+        return self.surface.blit(image, position)
+
+    def blits(self, entries, doreturn=True):
+        return self.surface.blits(entries, doreturn)
+
+    def refresh(self, image, area=None):
+        # Blits always read an image's current pixels, nothing to do
+        pass
+
+    def get_width(self):
+        return self.surface.get_width()
+
+    def get_height(self):
+        return self.surface.get_height()
+
+    def get_rect(self):
+        return self.surface.get_rect()
+
+    def present(self, dirty_rects):
+        # Only the changed areas are copied to the window
+        if dirty_rects:
+            pygame.display.update(dirty_rects)
+
+class TextureBackend:
+    def __init__(self, size, caption, accelerated=-1):
+        from pygame._sdl2.video import Renderer, Texture, Window
+        self.texture_type = Texture
+        self.window = Window(caption, size=size)
+        self.renderer = Renderer(self.window, accelerated=accelerated)
+        self.size = size
+        # One texture per image. Images that are no longer used anywhere
+        # (dropped terrain strips, old HUD text) take their texture with them.
+        self.textures = weakref.WeakKeyDictionary()
+
+    def texture(self, image):
+        texture = self.textures.get(image)
+        if texture is None:
+            texture = self.textures[image] = self.texture_type.from_surface(self.renderer, image)
+        return texture
+
+    def blit(self, image, position):
+        # Positions are truncated to whole pixels like Surface.blit does
+        if isinstance(position, pygame.Rect):
+            x, y = position.topleft
+        else:
+            x, y = int(position[0]), int(position[1])
+        rect = pygame.Rect(x, y, image.get_width(), image.get_height())
+        self.texture(image).draw(dstrect=rect)
+        return rect
+
+    def blits(self, entries, doreturn=True):
+        # Entries are (image, position) or (image, position, area) like Surface.blits
+        rects = []
+        for entry in entries:
+            image, position = entry[0], entry[1]
+            area = entry[2] if len(entry) > 2 else None
+            if area is None:
+                rect = self.blit(image, position)
+            else:
+                if isinstance(position, pygame.Rect):
+                    position = position.topleft
+                rect = pygame.Rect(int(position[0]), int(position[1]), area.width, area.height)
+                self.texture(image).draw(srcrect=area, dstrect=rect)
+            rects.append(rect)
+        return rects if doreturn else None
+
+    def refresh(self, image, area=None):
+        # An image that was drawn before has changed, upload it (or area of it) again
+        texture = self.textures.get(image)
+        if texture is not None:
+            if area is None:
+                texture.update(image)
+            else:
+                texture.update(image.subsurface(area), area)
+
+    def get_width(self):
+        return self.size[0]
+
+    def get_height(self):
+        return self.size[1]
+
+    def get_rect(self):
+        return pygame.Rect((0, 0), self.size)
+
+    def present(self, dirty_rects):
+        # After present() the renderer's buffer is undefined, so a frame that
+        # changed nothing is simply not presented and the window keeps showing the last one
+        if dirty_rects:
+            self.renderer.present()
+
+def create_backend(name, size, caption):
+    if name == "textures":
+        return TextureBackend(size, caption)
+    return SoftwareBackend(size, caption)
@@ -0,0 +1,173 @@
+import json
+import sys
+import time
+from game import Game
+from levelfile import LevelFile, LevelFileError
+
+# A replay is everything needed to play a run again: the level seed and
+# settings (or the level file and a hash of its content), plus the frame of every mouse press and release the game
+# handled. To keep files small each edge is stored as one number, the
+# frames since the previous edge times two plus one for a press. Playback
+# is headless and steps as fast as the CPU allows.
+#
+# Replay files hold one JSON replay per line, so they can be read one
+# replay at a time no matter how large the file gets.
+
+class Replay:
+    def __init__(self, level_seed, screen_width=800, screen_height=600, wall_segments=None,
+                 spikes_per_segment=0.5, edges=(), score=None, frames=None, game_over=True,
+                 level_path=None, level_hash=None, check_reachable=True):
+        self.level_seed = level_seed
+        self.screen_width = screen_width
+        self.screen_height = screen_height
+        self.wall_segments = wall_segments
+        self.spikes_per_segment = spikes_per_segment
+        self.edges = list(edges)  # (frame, mouse down) for every press and release
+        self.score = score  # Claimed result of the run
+        self.frames = frames
+        self.game_over = game_over  # False if the run was stopped while still alive
+        self.level_path = level_path  # Level file the run was played on, None for a generated level
+        self.level_hash = level_hash
+        self.check_reachable = check_reachable  # Game setting the level was generated with
+
+    def to_json(self):
+        frames = [0] + [frame for frame, down in self.edges]
+        packed = [(frame - previous) * 2 + down
+                  for previous, (frame, down) in zip(frames, self.edges)]
+        data = {
+            "seed": self.level_seed,
+            "size": [self.screen_width, self.screen_height],
+            "wall_segments": self.wall_segments,
+            "spikes_per_segment": self.spikes_per_segment,
+            "edges": packed,
+            "score": self.score,
+            "frames": self.frames,
+            "game_over": self.game_over,
+        }
+        if self.level_path is not None:
+            data["level"] = {"path": self.level_path, "hash": self.level_hash}
+        if not self.check_reachable:
+            data["check_reachable"] = False
+        return json.dumps(data, separators=(",", ":"))
+
+    @classmethod
+    def from_json(cls, line):
+        # Raises ValueError, KeyError or TypeError for a line that is not a
+        # replay, replay files can hold anything people submit
+        data = json.loads(line)
+        edges = []
+        frame = 0
+        for value in data["edges"]:
+            frame += int(value) // 2
+            edges.append((frame, int(value) % 2 == 1))
+        width, height = data["size"]
+        level = data.get("level") or {}
+        return cls(int(data["seed"]), int(width), int(height), optional_int(data["wall_segments"]),
+                   float(data["spikes_per_segment"]), edges, optional_int(data["score"]),
+                   optional_int(data["frames"]), bool(data["game_over"]),
+                   level.get("path"), level.get("hash"), bool(data.get("check_reachable", True)))
+
+def optional_int(value):
+    return None if value is None else int(value)
+
+def record(game):
+    # Replay of the game's current run
+    source = game.level_source
+    return Replay(game.level.seed, game.screen_width, game.screen_height, game.wall_segments,
+                  game.spikes_per_segment, game.input_log, game.score, game.frame, game.game_over,
+                  source.path if source is not None else None,
+                  source.content_hash() if source is not None else None, game.check_reachable)
+
+def open_level(path, levels=None):
+    # LevelFile at path. levels is an optional dict of already open level
+    # files by path, so verifying many replays of one level opens and hashes it once.
+    if levels is None:
+        return LevelFile(path)
+    if path not in levels:
+        levels[path] = LevelFile(path)
+    return levels[path]
+
+def play(replay, max_frames=None, levels=None):
+    # Play a replay headlessly and return the finished game. Raises
+    # LevelFileError when the replay's level file is not the one it was recorded on.
+    level_source = None
+    if replay.level_path is not None:
+        level_source = open_level(replay.level_path, levels)
+        if level_source.content_hash() != replay.level_hash:
+            raise LevelFileError(f"{replay.level_path} changed since the replay was recorded")
+    game = Game(replay.screen_width, replay.screen_height, headless=True,
+                wall_segments=replay.wall_segments, spikes_per_segment=replay.spikes_per_segment,
+                level_source=level_source, level_seed=replay.level_seed, check_reachable=replay.check_reachable)
+    if max_frames is None:
+        max_frames = replay.frames
+
+    edges = replay.edges
+    next_edge = 0
+    while not game.game_over and game.frame < max_frames:
+        # Apply the presses and releases that happened before this frame's update
+        while next_edge < len(edges) and edges[next_edge][0] <= game.frame:
+            if edges[next_edge][1]:
+                game.handle_mouse_down()
+            else:
+                game.handle_mouse_up()
+            next_edge += 1
+        game.update()
+    return game
+
+def verify(replay, levels=None):
+    # True when playing the replay gives the claimed score on the claimed frame
+    try:
+        game = play(replay, levels=levels)
+    except (OSError, LevelFileError):
+        return False  # The level file is gone or different
+    return (game.score == replay.score and game.frame == replay.frames
+            and game.game_over == replay.game_over)
+
+def save(path, replay):
+    with open(path, "a") as f:
+        f.write(replay.to_json() + "\n")
+
+def load(path):
+    # Yield (line number, replay) for the replays in a file one by one, the
+    # replay is None for a line that cannot be read
+    with open(path) as f:
+        for number, line in enumerate(f, 1):
+            if not line.strip():
+                continue
+            try:
+                yield number, Replay.from_json(line)
+            except (ValueError, KeyError, TypeError):
+                yield number, None
+
+def verify_file(path):
+    # Verify every replay in a file and return the number of valid and
+    # invalid ones and the frames played. Unreadable lines count as invalid.
+    valid = invalid = frames = 0
+    levels = {}  # Level files by path, shared by all replays in the file
+    try:
+        for number, replay in load(path):
+            if replay is None:
+                invalid += 1
+                print(f"line {number}: not a replay")
+            elif verify(replay, levels):
+                valid += 1
+            else:
+                invalid += 1
+                print(f"line {number}: claimed {replay.score}m in {replay.frames} frames does not match")
+            if replay is not None:
+                frames += replay.frames or 0
+    finally:
+        for level in levels.values():
+            level.close()
+    return valid, invalid, frames
+
+def main():
+    # Usage: python replay.py replays.jsonl
+    start = time.perf_counter()
+    valid, invalid, frames = verify_file(sys.argv[1])
+    elapsed = max(time.perf_counter() - start, 1e-9)
+    print(f"{valid} valid, {invalid} invalid, {frames / 60 / elapsed:.0f}x real time")
+    sys.exit(1 if invalid else 0)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,114 @@
+import argparse
+import multiprocessing
+import time
+import numpy as np
+from game import Game
+from headless import idle_policy, zigzag_policy, run_episode
+
+# Plays many independent headless episodes on a pool of worker processes.
+# Every episode has its own seed, so the results do not depend on how the
+# episodes are spread over the workers. Workers write their results
+# straight into shared arrays (score, frames survived, cause of death),
+# so nothing but episode numbers is pickled between processes.
+
+CAUSES = ["survived", "spike", "wall", "left edge"]
+
+def random_policy(game):
+    # Flip the mouse button about three times a second, using the game's own RNG
+    # so the episode stays reproducible from its seed
+    if game.random.random() < 0.05:
+        return not game.is_mouse_down
+    return game.is_mouse_down
+
+POLICIES = {
+    "idle": idle_policy,
+    "zigzag": zigzag_policy,
+    "random": random_policy,
+}
+
+# Set in every worker by init_worker
+shared = {}
+
+def init_worker(scores, frames, causes, settings):
+    shared["scores"] = scores
+    shared["frames"] = frames
+    shared["causes"] = causes
+    shared["settings"] = settings
+
+def run_batch(episodes):
+    # Play a range of episodes and store their results in the shared arrays
+    settings = shared["settings"]
+    policy = POLICIES[settings["policy"]]
+    scores, frames, causes = shared["scores"], shared["frames"], shared["causes"]
+    for episode in episodes:
+        game = Game(settings["width"], settings["height"], headless=True,
+                    seed=settings["seed"] + episode, wall_segments=settings["wall_segments"],
+                    spikes_per_segment=settings["spikes_per_segment"],
+                    check_reachable=settings["check_reachable"])
+        scores[episode] = run_episode(game, policy, settings["max_frames"], settings["frame_skip"])
+        frames[episode] = game.frame
+        causes[episode] = CAUSES.index(game.death_cause or "survived")
+    return len(episodes)
+
+def run(episodes, policy="random", processes=None, seed=0, max_frames=60 * 60,
+        width=800, height=600, wall_segments=None, spikes_per_segment=0.5, batch_size=256, frame_skip=1,
+        check_reachable=True):
+    # check_reachable=False plays the levels exactly as the generator makes them
+    # Returns score, frames and cause arrays with one entry per episode
+    scores = multiprocessing.Array("i", episodes, lock=False)
+    frames = multiprocessing.Array("i", episodes, lock=False)
+    causes = multiprocessing.Array("b", episodes, lock=False)
+    settings = {"policy": policy, "seed": seed, "max_frames": max_frames, "width": width,
+                "height": height, "wall_segments": wall_segments,
+                "spikes_per_segment": spikes_per_segment, "frame_skip": frame_skip,
+                "check_reachable": check_reachable}
+
+    batches = [range(start, min(start + batch_size, episodes)) for start in range(0, episodes, batch_size)]
+    with multiprocessing.Pool(processes, init_worker, (scores, frames, causes, settings)) as pool:
+        for _ in pool.imap_unordered(run_batch, batches):
+            pass
+
+    return (np.frombuffer(scores, dtype=np.int32).copy(),
+            np.frombuffer(frames, dtype=np.int32).copy(),
+            np.frombuffer(causes, dtype=np.int8).copy())
+
+def summarize(scores, frames, causes):
+    summary = {
+        "episodes": len(scores),
+        "mean_score": float(scores.mean()) if len(scores) else 0.0,
+        "median_score": float(np.median(scores)) if len(scores) else 0.0,
+        "p95_score": float(np.percentile(scores, 95)) if len(scores) else 0.0,
+        "max_score": int(scores.max(initial=0)),
+        "mean_frames": float(frames.mean()) if len(frames) else 0.0,
+    }
+    for code, cause in enumerate(CAUSES):
+        summary[cause] = int((causes == code).sum())
+    return summary
+
+def main():
+    parser = argparse.ArgumentParser(description="Play many headless episodes on all cores")
+    parser.add_argument("--episodes", type=int, default=10000)
+    parser.add_argument("--policy", choices=sorted(POLICIES), default="random")
+    parser.add_argument("--processes", type=int, default=None, help="defaults to the number of cores")
+    parser.add_argument("--seed", type=int, default=0, help="episode n uses seed + n")
+    parser.add_argument("--max-frames", type=int, default=60 * 60)
+    parser.add_argument("--wall-segments", type=int, default=None)
+    parser.add_argument("--spikes-per-segment", type=float, default=0.5)
+    parser.add_argument("--frame-skip", type=int, default=1, help="frames the policy's choice is held for")
+    parser.add_argument("--raw-levels", action="store_true",
+                        help="skip the reachability check, play what the level generator makes")
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    scores, frames, causes = run(args.episodes, args.policy, args.processes, args.seed, args.max_frames,
+                                 wall_segments=args.wall_segments,
+                                 spikes_per_segment=args.spikes_per_segment, frame_skip=args.frame_skip,
+                                 check_reachable=not args.raw_levels)
+    elapsed = time.perf_counter() - start
+
+    for key, value in summarize(scores, frames, causes).items():
+        print(f"{key:<14} {value}")
+    print(f"{args.episodes / elapsed:.0f} episodes/s, {frames.sum() / 60 / elapsed:.0f}x real time")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,115 @@
+import numpy as np
+
+# Ray-cast sensors for bots. A fan of rays is cast from one or many
+# positions at once against the walls and spikes of a Level and every ray
+# reports how far it got and what it hit. Candidates come from the level's
+# spatial indexes, positions are grouped by x so each group only tests the
+# geometry within reach, and within a group every ray is tested against
+# every candidate in one NumPy expression.
+#
+# Positions are in level coordinates (player x is rect.centerx + camera_x).
+# Angles are in degrees like Player.angle: 0 points right, 90 points down.
+
+NOTHING = 0
+WALL = 1
+SPIKE = 2
+
+GROUP_SIZE = 256  # Positions per vectorized block, bounds the temporary arrays
+
+def ray_fan(count, spread=180, center=0):
+    # count angles evenly spread over spread degrees around center
+    if count == 1:
+        return np.array([float(center)])
+    return np.linspace(center - spread / 2, center + spread / 2, count)
+
+def wall_hits(origin_x, origin_y, direction_x, direction_y, x1, y1, x2, y2):
+    # Distance along each ray (rows: positions, columns: rays) to the
+    # nearest of the segments, inf where a ray misses all of them
+    edge_x = (x2 - x1)[None, None, :]
+    edge_y = (y2 - y1)[None, None, :]
+    offset_x = x1[None, None, :] - origin_x[:, None, None]
+    offset_y = y1[None, None, :] - origin_y[:, None, None]
+    dx = direction_x[None, :, None]
+    dy = direction_y[None, :, None]
+    with np.errstate(divide="ignore", invalid="ignore"):
+        denominator = dx*edge_y - dy*edge_x
+        t = (offset_x*edge_y - offset_y*edge_x) / denominator
+        u = (offset_x*dy - offset_y*dx) / denominator
+    hit = (denominator != 0) & (t >= 0) & (u >= 0) & (u <= 1)
+    return np.where(hit, t, np.inf).min(axis=2, initial=np.inf)
+
+def spike_hits(origin_x, origin_y, direction_x, direction_y, spike_x, spike_y, radius):
+    # Same for spikes, which are circles of the given radius
+    offset_x = origin_x[:, None, None] - spike_x[None, None, :]
+    offset_y = origin_y[:, None, None] - spike_y[None, None, :]
+    b = offset_x*direction_x[None, :, None] + offset_y*direction_y[None, :, None]
+    c = offset_x**2 + offset_y**2 - radius[None, None, :]**2
+    discriminant = b*b - c
+    with np.errstate(invalid="ignore"):
+        root = np.sqrt(discriminant)
+    t = np.where(c <= 0, 0.0, -b - root)  # A ray starting inside a spike hits it right away
+    hit = (discriminant >= 0) & (t >= 0)
+    return np.where(hit, t, np.inf).min(axis=2, initial=np.inf)
+
+class Sensors:
+    # Casts the same fan of rays from any number of positions in a level
+    def __init__(self, angles, max_distance=400, spike_radius=0.7):
+        self.angles = np.asarray(angles, dtype=float)
+        self.direction_x = np.cos(np.radians(self.angles))
+        self.direction_y = np.sin(np.radians(self.angles))
+        self.max_distance = max_distance
+        self.spike_radius = spike_radius  # Spike radius as a fraction of its size, as in Spike.check_collision
+
+    def cast(self, level, x, y):
+        # Returns distances and hit kinds, both shaped (positions, rays).
+        # Rays that hit nothing within max_distance report max_distance and NOTHING.
+        x = np.atleast_1d(np.asarray(x, dtype=float))
+        y = np.atleast_1d(np.asarray(y, dtype=float))
+        distances = np.full((len(x), len(self.angles)), float(self.max_distance))
+        kinds = np.zeros((len(x), len(self.angles)), dtype=np.int8)
+
+        order = np.argsort(x, kind="stable")
+        for start in range(0, len(order), GROUP_SIZE):
+            group = order[start:start + GROUP_SIZE]
+            group_x, group_y = x[group], y[group]
+            x_min = group_x.min() - self.max_distance
+            x_max = group_x.max() + self.max_distance
+
+            wall = np.full((len(group), len(self.angles)), np.inf)
+            segments = self.wall_candidates(level, x_min, x_max)
+            if segments is not None:
+                wall = wall_hits(group_x, group_y, self.direction_x, self.direction_y, *segments)
+            spike = np.full((len(group), len(self.angles)), np.inf)
+            spikes = self.spike_candidates(level, x_min, x_max)
+            if spikes is not None:
+                spike = spike_hits(group_x, group_y, self.direction_x, self.direction_y, *spikes)
+
+            nearest = np.minimum(wall, spike)
+            found = nearest <= self.max_distance
+            distances[group] = np.where(found, nearest, self.max_distance)
+            kinds[group] = np.where(found, np.where(spike < wall, SPIKE, WALL), NOTHING)
+        return distances, kinds
+
+    def wall_candidates(self, level, x_min, x_max):
+        # Endpoint arrays of every wall segment overlapping [x_min, x_max]
+        ids = (level.flat_wall_index.query(x_min, x_max) +
+               level.angled_wall_index.query(x_min, x_max))
+        if not ids:
+            return None
+        segments = level.segments
+        rows = np.asarray(ids) - segments.base
+        return tuple(np.frombuffer(column, dtype=float)[rows]
+                     for column in (segments.x1, segments.y1, segments.x2, segments.y2))
+
+    def spike_candidates(self, level, x_min, x_max):
+        spikes = level.spike_index.query(x_min, x_max)
+        if not spikes:
+            return None
+        data = np.array([(spike.x, spike.y, spike.size * self.spike_radius) for spike in spikes])
+        return data[:, 0], data[:, 1], data[:, 2]
+
+    def read(self, game):
+        # Readings for the player of one game, shaped (rays,)
+        rect = game.player.rect
+        distances, kinds = self.cast(game.level, rect.centerx + game.camera_x, rect.centery)
+        return distances[0], kinds[0]
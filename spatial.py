@@ -0,0 +1,39 @@
+import bisect
+
+class SpatialIndex:
+    # Keeps objects sorted by the left edge of their x range, so finding the
+    # ones near the player is a binary search instead of a loop over the
+    # whole level. The cost of a query only depends on how many objects are
+    # actually near the queried range.
+    def __init__(self):
+        self.starts = []  # Sorted left edges
+        self.ends = []  # Right edge of each object
+        self.items = []
+        self.max_width = 0  # Widest object, tells us how far left to look
+
+    def __len__(self):
+        return len(self.items)
+
+    def add(self, x_min, x_max, item):
+        # Levels are generated left to right, so this is almost always an append
+        i = bisect.bisect_right(self.starts, x_min)
+        self.starts.insert(i, x_min)
+        self.ends.insert(i, x_max)
+        self.items.insert(i, item)
+        self.max_width = max(self.max_width, x_max - x_min)
+
+    def remove_if(self, predicate):
+        # Drop every object for which predicate(item) is true. Indexes only
+        # hold the few chunks around the camera, so a full pass is cheap.
+        keep = [i for i, item in enumerate(self.items) if not predicate(item)]
+        if len(keep) == len(self.items):
+            return
+        self.starts[:] = [self.starts[i] for i in keep]
+        self.ends[:] = [self.ends[i] for i in keep]
+        self.items[:] = [self.items[i] for i in keep]
+
+    def query(self, x_min, x_max):
+        # Return every object whose x range overlaps [x_min, x_max]
+        lo = bisect.bisect_left(self.starts, x_min - self.max_width)
+        hi = bisect.bisect_right(self.starts, x_max)
+        return [self.items[i] for i in range(lo, hi) if self.ends[i] >= x_min]
@@ -0,0 +1,63 @@
+import replay
+from game import Game
+
+def recorded_run(seed, frames=300):
+    # A short headless run that holds and releases the mouse every 20 frames
+    game = Game(800, 600, headless=True, seed=seed)
+    for frame in range(frames):
+        if game.step(frame % 40 < 20):
+            break
+    return replay.record(game)
+
+def test_corrupt_line_does_not_stop_verification(tmp_path, capsys):
+    path = tmp_path / "replays.jsonl"
+    replay.save(path, recorded_run(1))
+    with open(path, "a") as f:
+        f.write('{"seed": 5, "size": [800, 600]}\n')  # No edges
+        f.write('{"seed": 5, "size": [800, 6\n')  # Torn write
+        f.write('{"seed": "x", "size": [800, 600], "wall_segments": null, "spikes_per_segment": 0.5,'
+                ' "edges": [], "score": 0, "frames": 1, "game_over": true}\n')
+    replay.save(path, recorded_run(2))
+
+    valid, invalid, frames = replay.verify_file(path)
+    assert (valid, invalid) == (2, 3)
+    output = capsys.readouterr().out
+    for number in (2, 3, 4):
+        assert f"line {number}: not a replay" in output
+
+def test_changed_replay_is_invalid(tmp_path):
+    run = recorded_run(3)
+    run.score += 1
+    path = tmp_path / "replays.jsonl"
+    replay.save(path, run)
+    assert replay.verify_file(path)[:2] == (0, 1)
+
+def test_replay_of_unchecked_level(tmp_path):
+    game = Game(800, 600, headless=True, seed=4, check_reachable=False)
+    for frame in range(300):
+        if game.step(frame % 30 < 15):
+            break
+    path = tmp_path / "replays.jsonl"
+    replay.save(path, replay.record(game))
+    assert next(replay.load(path))[1].check_reachable is False
+    assert replay.verify_file(path)[:2] == (1, 0)
+
+def test_level_file_opened_once_per_file(tmp_path, monkeypatch):
+    from levelfile import LevelFile, export_generated
+    level_path = str(tmp_path / "level.zzl")
+    export_generated(level_path, 7, 30)
+    path = tmp_path / "replays.jsonl"
+    for seed in range(3):
+        game = Game(800, 600, headless=True, seed=seed, level_source=LevelFile(level_path))
+        for frame in range(200):
+            if game.step(frame % (20 + seed) < 10):
+                break
+        replay.save(path, replay.record(game))
+
+    opened = []
+    def open_level_file(level_path):
+        opened.append(level_path)
+        return LevelFile(level_path)
+    monkeypatch.setattr(replay, "LevelFile", open_level_file)
+    assert replay.verify_file(path)[:2] == (3, 0)
+    assert opened == [level_path]
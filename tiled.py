@@ -0,0 +1,121 @@
+import hashlib
+import json
+import os
+import xml.etree.ElementTree as ElementTree
+from levelfile import VERSION, LevelFileError, write_level
+
+# Imports levels drawn in the Tiled map editor (https://www.mapeditor.org/).
+# A map needs an object layer with:
+#
+#   - polylines named or typed "top" and "bottom" for the two walls
+#     (several pieces per wall are fine, they are joined left to right)
+#   - objects named or typed "spike"; the spike sits at the center of the
+#     object, its size is the "size" property or half the object's width
+#
+# Tiled's coordinates are pixels with y pointing down, same as the game.
+# Compiled maps are cached by a hash of the map file, so unchanged maps are
+# never compiled twice.
+
+DEFAULT_SPIKE_SIZE = 30
+MAP_EXTENSIONS = (".tmx", ".json")  # Matched in any case
+IMPORTER_VERSION = 2  # Part of the cache key, bump it when the importer output changes
+CACHE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), ".level_cache")
+
+def object_kind(obj):
+    # Tiled 1.9 renamed an object's "type" to "class", accept both and the name
+    for key in ("type", "class", "name"):
+        value = (obj.get(key) or "").strip().lower()
+        if value in ("top", "bottom", "spike"):
+            return value
+    return None
+
+def add_object(level, kind, x, y, width, height, polyline, properties):
+    if kind in ("top", "bottom"):
+        if not polyline:
+            raise LevelFileError(f"the {kind} wall object needs to be a polyline")
+        level[kind].append([(x + px, y + py) for px, py in polyline])
+    elif kind == "spike":
+        size = float(properties.get("size", width / 2 if width else DEFAULT_SPIKE_SIZE))
+        level["spike"].append((x + width / 2, y + height / 2, size))
+
+def read_json(path):
+    with open(path) as f:
+        data = json.load(f)
+    level = {"top": [], "bottom": [], "spike": []}
+
+    def visit(layers):
+        for layer in layers:
+            if layer.get("type") == "group":
+                visit(layer.get("layers", []))
+            for obj in layer.get("objects", []):
+                kind = object_kind(obj)
+                if kind is None:
+                    continue
+                polyline = [(p["x"], p["y"]) for p in obj.get("polyline", [])]
+                properties = {p["name"]: p["value"] for p in obj.get("properties", [])}
+                add_object(level, kind, obj.get("x", 0), obj.get("y", 0), obj.get("width", 0),
+                           obj.get("height", 0), polyline, properties)
+
+    visit(data.get("layers", []))
+    return level
+
+def read_tmx(path):
+    root = ElementTree.parse(path).getroot()
+    level = {"top": [], "bottom": [], "spike": []}
+    for obj in root.iter("object"):
+        kind = object_kind(obj.attrib)
+        if kind is None:
+            continue
+        polyline = []
+        element = obj.find("polyline")
+        if element is not None:
+            for pair in element.get("points", "").split():
+                px, py = pair.split(",")
+                polyline.append((float(px), float(py)))
+        properties = {p.get("name"): p.get("value") for p in obj.iter("property")}
+        add_object(level, kind, float(obj.get("x", 0)), float(obj.get("y", 0)),
+                   float(obj.get("width", 0)), float(obj.get("height", 0)), polyline, properties)
+    return level
+
+def read_map(path):
+    # Returns top points, bottom points and spikes of a Tiled map
+    level = read_json(path) if path.lower().endswith(".json") else read_tmx(path)
+    walls = []
+    for kind in ("top", "bottom"):
+        if not level[kind]:
+            raise LevelFileError(f"{path} has no {kind} wall")
+        # A polyline may be drawn right to left, the game needs left to right
+        pieces = [piece[::-1] if piece[0][0] > piece[-1][0] else piece for piece in level[kind]]
+        walls.append([point for piece in sorted(pieces) for point in piece])
+    return walls[0], walls[1], level["spike"]
+
+def map_hash(path):
+    digest = hashlib.sha256(f"zigzag level v{VERSION} importer v{IMPORTER_VERSION}\n".encode())
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 16), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+def is_map(path):
+    return path.lower().endswith(MAP_EXTENSIONS)
+
+def level_file_path(path):
+    # The level file to play for path: Tiled maps are compiled (or taken
+    # from the cache), anything else is expected to be a level file already
+    return compile_map(path) if is_map(path) else path
+
+def compile_map(path, output=None, cache_dir=CACHE_DIR):
+    # Compile a Tiled map to a level file and return the level file's path.
+    # Without an output path the result goes to the cache, keyed by content.
+    if output is None:
+        os.makedirs(cache_dir, exist_ok=True)
+        output = os.path.join(cache_dir, map_hash(path) + ".zzl")
+        if os.path.exists(output):
+            return output
+
+    top, bottom, spikes = read_map(path)
+    # Write next to the target and rename, so a crash never leaves half a file in the cache
+    temporary = output + ".tmp"
+    write_level(temporary, top, bottom, spikes)
+    os.replace(temporary, output)
+    return output